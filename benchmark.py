@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the render, parse and display-loop hot paths
+Runs headless on the virtual matrix against recorded responses in fixtures/
+
+    python3 benchmark.py                          # print results as JSON
+    python3 benchmark.py -o bench.json            # save a run
+    python3 benchmark.py --compare bench.json     # flag regressions against a saved run
+    python3 benchmark.py --loop-minutes 5         # longer simulated display_loop run
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+import matrix_display
+from matrix_display import (
+    MatrixDisplay, WeatherDisplay, MLBDisplay, SubwayDisplay, TransiterFeed,
+    DataFetcher, RefreshScheduler, HttpClient
+)
+from virtual_matrix import VirtualMatrix
+from standings import STANDINGS_FIELDS, parse_standings
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+WALL_SIZES = ((64, 32), (128, 64), (192, 64))  # Single panel, 2x2 and 3x2 chained walls
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+def transiter_fixture():
+    """Recorded Transiter stop JSON with departures shifted to start a minute from now"""
+    data = json.loads(load_fixture('transiter_A38.json'))
+    times = [int(st['departure']['time']) for st in data['stopTimes'] if st.get('departure')]
+    offset = int(time.time()) + 60 - min(times)
+    for st in data['stopTimes']:
+        for key in ('arrival', 'departure'):
+            if st.get(key):
+                st[key]['time'] = str(int(st[key]['time']) + offset)
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+class FixtureClient:
+    """Stands in for HttpClient; every call decodes the recorded payload afresh"""
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def get_json(self, url, timeout=None, headers=None):
+        return json.loads(self.payload)
+
+    def get(self, url, parse, timeout=None, headers=None):
+        return parse(types.SimpleNamespace(content=self.payload))
+
+
+def summarise(timings):
+    timings = sorted(timings)
+    return {
+        'iterations': len(timings),
+        'mean_us': round(statistics.fmean(timings) * 1e6, 2),
+        'median_us': round(statistics.median(timings) * 1e6, 2),
+        'p95_us': round(timings[int(len(timings) * 0.95) - 1] * 1e6, 2),
+        'min_us': round(timings[0] * 1e6, 2)
+    }
+
+
+def bench(results, name, func, iterations, warmup=10):
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    results[name] = summarise(timings)
+
+
+def bench_draw_text(results, iterations):
+    display = MatrixDisplay(VirtualMatrix())
+    for length in (4, 8, 16, 32):
+        text = ('HUMIDITY 50% ' * 3)[:length]
+        bench(results, f"draw_text/{length}/cached", lambda: display.draw_text(text, 0, 0, 255, 255, 255), iterations)
+
+        def uncached():
+            display.text_cache.clear()
+            display.draw_text(text, 0, 0, 255, 255, 255)
+
+        bench(results, f"draw_text/{length}/uncached", uncached, iterations)
+
+
+def loaded_screens(display):
+    weather = WeatherDisplay(display, client=FixtureClient(load_fixture('weather.json')))
+    mlb = MLBDisplay(display, client=FixtureClient(load_fixture('standings.json')))
+    subway = SubwayDisplay(display, feed=TransiterFeed(client=FixtureClient(transiter_fixture())))
+    return {'weather': (weather, weather.fetch_weather), 'mlb': (mlb, mlb.fetch_standings), 'subway': (subway, subway.fetch_trains)}
+
+
+def bench_screens(results, iterations):
+    display = MatrixDisplay(VirtualMatrix())
+    screens = loaded_screens(display)
+
+    with contextlib.redirect_stdout(io.StringIO()):  # Fetchers log every call
+        for name, (screen, fetch) in screens.items():
+            bench(results, f"parse/{name}", fetch, iterations)
+            bench(results, f"render/{name}", screen.render, iterations)
+
+            def render_and_swap():
+                display.panel_hash = display.back_frame = None  # Force a full blit + swap
+                screen.render()
+
+            bench(results, f"render_swap/{name}", render_and_swap, iterations)
+
+
+def bench_walls(results, iterations):
+    """Weather screen on larger chained walls: a full redraw vs one value changing"""
+    for width, height in WALL_SIZES:
+        display = MatrixDisplay(VirtualMatrix(width, height))
+        weather, fetch = loaded_screens(display)['weather']
+        with contextlib.redirect_stdout(io.StringIO()):
+            fetch()
+
+        def full():
+            display.panel_hash = display.back_frame = None
+            weather.render()
+
+        bench(results, f"wall/{width}x{height}/full", full, iterations)
+
+        humidity = itertools.count()
+
+        def one_value():
+            weather.weather = dict(weather.weather, humidity=next(humidity) % 100)
+            weather.render()
+
+        bench(results, f"wall/{width}x{height}/one_value", one_value, iterations)
+
+
+def peak_memory(func):
+    """Peak bytes Python allocates during one call"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_standings(results, iterations):
+    """Standings parse: the old full-tree load + scan vs the projecting parse, with and without fields="""
+    full = load_fixture('standings.json')
+    keep = set(STANDINGS_FIELDS.split(','))
+
+    def trim(value):
+        if isinstance(value, dict):
+            return {k: trim(v) for k, v in value.items() if k in keep}
+        if isinstance(value, list):
+            return [trim(v) for v in value]
+        return value
+
+    fields = json.dumps(trim(json.loads(full)), separators=(',', ':')).encode()  # What fields= returns
+
+    def full_tree():
+        data = json.loads(full)
+        return next(r for r in data['records'] if r['division']['id'] == 204)['teamRecords'][:4]
+
+    cases = {
+        'full_tree': full_tree,
+        'projected': lambda: parse_standings(full.decode()),
+        'projected_fields': lambda: parse_standings(fields.decode())
+    }
+    for name, func in cases.items():
+        bench(results, f"standings/{name}", func, iterations)
+        results[f"standings/{name}"]['peak_bytes'] = peak_memory(func)
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    routes = {}
+
+    def do_GET(self):
+        body = self.routes.get(self.path.split('?')[0])
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+SWITCH_INTERVAL = 5  # Seconds between simulated screen switches
+SWITCH_SCREENS = ('weather', 'mlb', 'subway')
+SWITCH_TARGET_MS = 50  # API command to swapped frame
+
+
+def run_display_loop(minutes):
+    """Run the web variant's real display_loop against a local stub server"""
+    import matrix_display_web as web
+
+    FixtureHandler.routes = {
+        '/weather': load_fixture('weather.json'),
+        '/standings': load_fixture('standings.json'),
+        '/A38': transiter_fixture()
+    }
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    client = HttpClient()
+    web.display = MatrixDisplay(VirtualMatrix(), font=web.FONT_3X5)
+    web.weather_display = WeatherDisplay(web.display, url=f"{base}/weather", client=client)
+    web.mlb_display = MLBDisplay(web.display, url=f"{base}/standings", client=client)
+    web.subway_display = SubwayDisplay(web.display, feed=TransiterFeed(url=f"{base}/A38", client=client))
+    web.message_display = matrix_display.MessageDisplay(web.display)
+    web.fetcher = DataFetcher({
+        'weather': web.weather_display.fetch_weather,
+        'mlb': web.mlb_display.fetch_standings,
+        'subway': web.subway_display.fetch_trains
+    })
+    web.scheduler = RefreshScheduler(web.fetcher, {
+        'weather': web.weather_display,
+        'mlb': web.mlb_display,
+        'subway': web.subway_display
+    }, wake=web.commands.ready)
+
+    cpu_start = time.process_time()
+    wall_start = time.monotonic()
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        threading.Thread(target=web.display_loop, daemon=True).start()
+        # Switch screens through the command queue every few seconds, like button presses
+        end = wall_start + minutes * 60
+        switches = 0
+        while time.monotonic() + SWITCH_INTERVAL < end:
+            time.sleep(SWITCH_INTERVAL)
+            switches += 1
+            command = web.commands.submit('screen', screen=SWITCH_SCREENS[switches % len(SWITCH_SCREENS)])
+            if command.applied.wait(1):
+                latencies.append(command.latency)
+        time.sleep(max(0, end - time.monotonic()))
+    wall = time.monotonic() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    server.shutdown()
+    return {
+        'minutes': minutes,
+        'cpu_percent': round(cpu / wall * 100, 2),
+        'switch_latency': summarise(latencies) if latencies else None,
+        'fps': web.frame_clock.stats(),
+        'frames': web.display.frame_stats(),
+        'http': client.stats()
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, threshold):
+    """Print per-benchmark change in mean time; return True if any slowed past threshold %"""
+    regressed = False
+    for name, result in current['benchmarks'].items():
+        before = baseline.get('benchmarks', {}).get(name)
+        if not before:
+            continue
+        change = (result['mean_us'] - before['mean_us']) / before['mean_us'] * 100
+        flag = ''
+        if change > threshold:
+            flag = '  ❌ REGRESSION'
+            regressed = True
+        print(f"{name:32} {before['mean_us']:>10.1f}us -> {result['mean_us']:>10.1f}us  {change:+6.1f}%{flag}", file=sys.stderr)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--iterations', type=int, default=500)
+    parser.add_argument('--loop-minutes', type=float, default=1, help='simulated display_loop run (0 to skip)')
+    parser.add_argument('-o', '--output', help='write results JSON to this file')
+    parser.add_argument('--compare', help='baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=10, help='regression threshold in percent')
+    args = parser.parse_args()
+
+    benchmarks = {}
+    bench_draw_text(benchmarks, args.iterations)
+    bench_screens(benchmarks, args.iterations)
+    bench_walls(benchmarks, args.iterations)
+    bench_standings(benchmarks, args.iterations)
+
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'timestamp': int(time.time()),
+        'benchmarks': benchmarks
+    }
+    if args.loop_minutes > 0:
+        results['display_loop'] = run_display_loop(args.loop_minutes)
+        latency = results['display_loop']['switch_latency']
+        if latency and latency['p95_us'] > SWITCH_TARGET_MS * 1000:
+            print(f"⚠️ Screen switch p95 {latency['p95_us'] / 1000:.1f}ms is over the {SWITCH_TARGET_MS}ms target", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
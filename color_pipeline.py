@@ -0,0 +1,144 @@
+"""
+Colour stage applied to each frame on its way to the panel
+
+Screens draw in plain RGB. At blit time the frame goes through a theme
+colour matrix, one gamma/brightness lookup table and a channel reorder.
+Each is a single C-level PIL call on the whole region. Changing any
+setting just rebuilds the tables, so no screen is re-rendered and the
+matrix is never reinitialised.
+
+    MATRIX_BRIGHTNESS=60                       default brightness, 0-100
+    MATRIX_BRIGHTNESS_SCHEDULE="7:60,22:15"    hour:brightness, local time
+    MATRIX_GAMMA=2.2                           gamma curve (1.0 = linear)
+    MATRIX_THEME=night                         one of THEMES
+    MATRIX_RGB_SEQUENCE=RBG                    panel channel order
+"""
+
+import os
+import math
+import time
+from PIL import Image
+
+# Theme colour matrices for Image.convert('RGB', matrix): each output
+# channel is a weighted sum of the input R, G, B plus an offset.
+LUMA = (0.299, 0.587, 0.114)
+THEMES = {
+    'default': None,
+    'night': (*LUMA, 0, 0, 0, 0, 0, 0, 0, 0, 0),  # Red only, easy on the eyes in the dark
+    'amber': (*LUMA, 0, *(w * 0.6 for w in LUMA), 0, 0, 0, 0, 0),
+    'mono': (*LUMA, 0, *LUMA, 0, *LUMA, 0),
+    'cool': (0.8, 0, 0, 0, 0, 0.9, 0, 0, 0, 0.1, 1.0, 0),
+}
+
+def finite(value, name):
+    """value as a finite float, else ValueError"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number: {value!r}")
+    if not math.isfinite(number):
+        raise ValueError(f"{name} must be finite: {value!r}")
+    return number
+
+
+def parse_schedule(text):
+    """'7:60,22:15' -> ((7, 60), (22, 15)), sorted by hour"""
+    entries = []
+    for entry in text.split(','):
+        if entry.strip():
+            hour, brightness = entry.split(':')
+            entries.append((int(hour), int(brightness)))
+    return tuple(sorted(entries))
+
+
+BRIGHTNESS = int(os.environ.get('MATRIX_BRIGHTNESS', 60))
+BRIGHTNESS_SCHEDULE = parse_schedule(os.environ.get('MATRIX_BRIGHTNESS_SCHEDULE', ''))
+GAMMA = float(os.environ.get('MATRIX_GAMMA', 1.0))  # rgbmatrix already corrects luminance
+THEME = os.environ.get('MATRIX_THEME', 'default')
+RGB_SEQUENCE = os.environ.get('MATRIX_RGB_SEQUENCE')
+
+
+class ColorPipeline:
+    """Theme, gamma, brightness and channel order as precomputed tables
+
+    `version` changes whenever the output would, so MatrixDisplay knows
+    to re-blit an unchanged frame.
+    """
+
+    def __init__(self, brightness=BRIGHTNESS, gamma=GAMMA, theme=THEME, channel_order=RGB_SEQUENCE or 'RGB', schedule=BRIGHTNESS_SCHEDULE):
+        self.brightness = self.gamma = self.theme = self.channel_order = None
+        self.schedule = schedule
+        self.scheduled = None  # Last brightness the schedule applied
+        self.next_check = 0
+        self.version = 0
+        self.set(brightness, gamma, theme, channel_order)
+
+    def set(self, brightness=None, gamma=None, theme=None, channel_order=None):
+        """Change any setting; raises ValueError and keeps the old tables if one is bad"""
+        brightness = self.brightness if brightness is None else round(max(0, min(100, finite(brightness, 'brightness'))))
+        gamma = self.gamma if gamma is None else finite(gamma, 'gamma')
+        theme = self.theme if theme is None else theme
+        channel_order = self.channel_order if channel_order is None else channel_order
+        if gamma <= 0:
+            raise ValueError(f"gamma must be positive: {gamma}")
+        if not isinstance(theme, str) or theme not in THEMES:
+            raise ValueError(f"Unknown theme: {theme}")
+        if not isinstance(channel_order, str) or sorted(channel_order) != ['B', 'G', 'R']:
+            raise ValueError(f"Bad channel order: {channel_order}")
+
+        # Build every table before touching state, so a failure leaves the old settings intact
+        scale = brightness / 100
+        curve = [min(255, round(255 * (v / 255) ** gamma * scale)) for v in range(256)]
+        self.lut = None if curve == list(range(256)) else curve * 3
+        self.matrix = THEMES[theme]
+        self.order = None if channel_order == 'RGB' else ['RGB'.index(c) for c in channel_order]
+        self.brightness, self.gamma, self.theme, self.channel_order = brightness, gamma, theme, channel_order
+        self.version += 1
+
+    def apply(self, image):
+        if self.matrix:
+            image = image.convert('RGB', self.matrix)
+        if self.lut:
+            image = image.point(self.lut)
+        if self.order:
+            bands = image.split()
+            image = Image.merge('RGB', [bands[i] for i in self.order])
+        return image
+
+    def tick(self, now=None):
+        """Follow the brightness schedule; a manual change holds until the next scheduled step"""
+        if not self.schedule:
+            return
+        now = time.time() if now is None else now
+        if now < self.next_check:
+            return
+        local = time.localtime(now)
+        self.next_check = now + 3600 - local.tm_min * 60 - local.tm_sec  # Steps fall on the hour
+
+        hour = local.tm_hour
+        brightness = self.schedule[-1][1]  # Before the first entry: still last night's setting
+        for start, level in self.schedule:
+            if hour >= start:
+                brightness = level
+        if brightness != self.scheduled:
+            self.scheduled = brightness
+            if brightness != self.brightness:
+                self.set(brightness=brightness)
+                print(f"🔆 Scheduled brightness: {brightness}%")
+
+    def idle_for(self, now=None):
+        """Seconds until the schedule may change brightness, or None without a schedule"""
+        if not self.schedule:
+            return None
+        now = time.time() if now is None else now
+        return max(0, self.next_check - now)
+
+    def settings(self):
+        return {
+            'brightness': self.brightness,
+            'gamma': self.gamma,
+            'theme': self.theme,
+            'channel_order': self.channel_order,
+            'schedule': [list(entry) for entry in self.schedule],
+            'themes': sorted(THEMES)
+        }
@@ -0,0 +1,114 @@
+"""
+Live stream of the composed framebuffer for browser viewers
+
+Every frame swapped to the panel is published once and fanned out to
+all connected viewers, so the simulator mirrors exactly what the LEDs
+show without fetching any upstream data itself.
+
+Each message is big-endian binary:
+    u8 kind (0 = keyframe, 1 = delta), u32 sequence,
+    u16 x, u16 y, u16 w, u16 h, then w * h RGB565 pixels, row by row
+A keyframe covers the whole panel; a delta covers the bounding box of
+the pixels that changed since the previous frame.
+"""
+
+import struct
+import threading
+from collections import deque
+from PIL import Image, ImageChops
+
+HEADER = struct.Struct('>BIHHHH')
+KEYFRAME = 0
+DELTA = 1
+
+# RGB565 as two bytes per pixel: RRRRRGGG GGGBBBBB.
+# Each byte is a sum of non-overlapping bit fields, so ImageChops.add never clips.
+HIGH_RED = [v & 0xF8 for v in range(256)]
+HIGH_GREEN = [v >> 5 for v in range(256)]
+LOW_GREEN = [(v & 0x1C) << 3 for v in range(256)]
+LOW_BLUE = [v >> 3 for v in range(256)]
+
+
+def rgb565(image):
+    """RGB image -> big-endian RGB565 bytes"""
+    r, g, b = image.split()
+    high = ImageChops.add(r.point(HIGH_RED), g.point(HIGH_GREEN))
+    low = ImageChops.add(g.point(LOW_GREEN), b.point(LOW_BLUE))
+    return Image.merge('LA', (high, low)).tobytes()
+
+
+class FrameStream:
+    """Fans panel frames out to any number of viewers
+
+    The render thread calls publish() after each swap; viewers share one
+    encoded message per frame rather than holding per-client queues. A
+    viewer that falls more than `history` frames behind (or has just
+    connected) gets a fresh keyframe instead of the missed deltas.
+    """
+
+    def __init__(self, history=30):
+        self.condition = threading.Condition()
+        self.sequence = 0
+        self.previous = None  # Last published frame
+        self.deltas = deque(maxlen=history)  # (sequence, message)
+        self.keyframe = None  # (sequence, message), built on demand
+        self.viewers = 0
+        self.bytes_sent = 0
+
+    def publish(self, image):
+        with self.condition:
+            previous, self.previous = self.previous, image.copy()
+            self.sequence += 1
+            self.keyframe = None
+
+            if not self.viewers or previous is None or previous.size != image.size:
+                self.deltas.clear()  # Nobody to send to; the next viewer starts from a keyframe
+            else:
+                box = ImageChops.difference(previous, self.previous).getbbox()
+                if box:
+                    self.deltas.append((self.sequence, self.encode(DELTA, self.previous, box)))
+                else:
+                    self.sequence -= 1  # Identical frame (e.g. re-shown after a capture)
+                    return
+            self.condition.notify_all()
+
+    def encode(self, kind, image, box):
+        x0, y0, x1, y1 = box
+        pixels = rgb565(image.crop(box))
+        return HEADER.pack(kind, self.sequence, x0, y0, x1 - x0, y1 - y0) + pixels
+
+    def current_keyframe(self):
+        """(sequence, message) for the latest frame; caller holds the condition"""
+        if self.keyframe is None and self.previous is not None:
+            self.keyframe = (self.sequence, self.encode(KEYFRAME, self.previous, (0, 0) + self.previous.size))
+        return self.keyframe
+
+    def frames(self, keepalive=15):
+        """Generator of messages for one viewer; yields None every `keepalive` idle seconds"""
+        with self.condition:
+            self.viewers += 1
+        try:
+            seen = 0
+            while True:
+                with self.condition:
+                    self.condition.wait_for(lambda: self.sequence > seen, keepalive)
+                    if self.sequence == seen:
+                        pending = [None]
+                    elif seen and self.deltas and self.deltas[0][0] <= seen + 1:
+                        pending = [message for sequence, message in self.deltas if sequence > seen]
+                    else:
+                        pending = [self.current_keyframe()[1]]
+                    seen = self.sequence
+                    self.bytes_sent += sum(len(message) for message in pending if message)
+                yield from pending
+        finally:
+            with self.condition:
+                self.viewers -= 1
+
+    def stats(self):
+        with self.condition:
+            return {
+                'viewers': self.viewers,
+                'frames': self.sequence,
+                'bytes_sent': self.bytes_sent
+            }
@@ -5,21 +5,55 @@ RGB LED Matrix Display for Raspberry Pi
 """
 
 import time
-import requests
-from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
-from PIL import Image, ImageDraw, ImageFont
+STARTED_AT = time.perf_counter()  # Start of the startup timing report
+
+import os
+import zlib
+import random
+import statistics
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageChops, ImageDraw
 import json
+import metrics
+from color_pipeline import ColorPipeline
+from virtual_matrix import virtual_matrix_from_env
+from standings import STANDINGS_URL, DIVISION, DIVISIONS, current_season, parse_standings
+
+# requests is imported on first fetch (HttpClient.connect), after the first frame is up
+
+try:
+    from rgbmatrix import RGBMatrix, RGBMatrixOptions
+except ImportError:
+    # Not on a Pi: only the virtual backend (MATRIX_BACKEND=virtual) is available
+    RGBMatrix = RGBMatrixOptions = None
+
+# Panel hardware: size of one panel, how many are daisy-chained and how many
+# chains run in parallel. A 128x64 wall is e.g. MATRIX_CHAIN=2 MATRIX_PARALLEL=2.
+PANEL_ROWS = int(os.environ.get('MATRIX_ROWS', 32))
+PANEL_COLS = int(os.environ.get('MATRIX_COLS', 64))
+PANEL_CHAIN = int(os.environ.get('MATRIX_CHAIN', 1))
+PANEL_PARALLEL = int(os.environ.get('MATRIX_PARALLEL', 1))
+PIXEL_MAPPER = os.environ.get('MATRIX_PIXEL_MAPPER', '')  # e.g. 'U-mapper' to fold a long chain
 
 # Matrix Configuration
 def configure_matrix():
+    matrix = virtual_matrix_from_env(PANEL_COLS * PANEL_CHAIN, PANEL_ROWS * PANEL_PARALLEL)
+    if matrix is not None:
+        return matrix
+    if RGBMatrix is None:
+        raise RuntimeError("rgbmatrix is not installed; set MATRIX_BACKEND=virtual to run without a panel")
+        
     options = RGBMatrixOptions()
-    options.rows = 32
-    options.cols = 64
-    options.chain_length = 1
-    options.parallel = 1
+    options.rows = PANEL_ROWS
+    options.cols = PANEL_COLS
+    options.chain_length = PANEL_CHAIN
+    options.parallel = PANEL_PARALLEL
+    options.pixel_mapper_config = PIXEL_MAPPER
     options.hardware_mapping = 'adafruit-hat'  # or 'regular' if not using HAT
     options.gpio_slowdown = 4  # Adjust if you see flickering (try 2-4)
-    options.brightness = 60  # 0-100
+    options.brightness = 100  # Dimming happens in the ColorPipeline, see MATRIX_BRIGHTNESS
     options.pwm_lsb_nanoseconds = 130
     
     return RGBMatrix(options = options)
@@ -67,44 +101,599 @@ FONT_3X5 = {
     '%': [[1,0,1],[0,0,1],[0,1,0],[1,0,0],[1,0,1]],
 }
 
+# Panel size in pixels
+# Screen layouts are drawn at this size, then scaled up to fill a larger wall
+MATRIX_WIDTH = 64
+MATRIX_HEIGHT = 32
+
+# Rows per dirty band: only bands that changed are scaled and blitted
+TILE_ROWS = 8
+
+# Bottom-right dot while a screen shows cached data not yet revalidated, or a failed refresh
+STALE_COLOR = (120, 80, 0)
+
+# Rendered strings kept by MatrixDisplay (labels + live values per screen)
+TEXT_CACHE_SIZE = 128
+
+# Marquee scroll speed in px/s and blank gap before the text repeats
+MARQUEE_SPEED = 20
+MARQUEE_GAP = 16
+MARQUEE_CACHE_SIZE = 16
+
+# Screen changes: 'slide', 'wipe', 'crossfade' or 'cut'
+TRANSITION_STYLE = 'slide'
+TRANSITION_DURATION = 0.5
+
+
+def build_glyph_atlas(font):
+    """Precompute lit pixel offsets and advance width for every glyph"""
+    atlas = {}
+    for char, char_data in font.items():
+        offsets = tuple(
+            (col, row)
+            for row, row_data in enumerate(char_data)
+            for col, bit in enumerate(row_data)
+            if bit == 1
+        )
+        atlas[char] = (offsets, len(char_data[0]) + 1)  # Character width + 1px spacing
+    return atlas
+
+
+class Transition:
+    """Animates between two fully rendered frames
+    
+    Both frames are rendered off-screen once up front; each step is one
+    or two C-level crop/paste/blend calls on the whole image rather than
+    a redraw of either screen.
+    """
+    
+    def __init__(self, outgoing, incoming, style=TRANSITION_STYLE, duration=TRANSITION_DURATION, start=None):
+        self.outgoing = outgoing
+        self.incoming = incoming
+        self.style = style
+        self.duration = duration
+        self.start = time.monotonic() if start is None else start
+        self.scratch = outgoing.copy()
+        
+    def done(self, now):
+        return self.style == 'cut' or now - self.start >= self.duration
+        
+    def frame(self, now):
+        progress = min(1.0, max(0.0, (now - self.start) / self.duration))
+        if self.style == 'crossfade':
+            return Image.blend(self.outgoing, self.incoming, progress)
+            
+        width, height = self.outgoing.size
+        split = round(progress * width)
+        if split <= 0:
+            return self.outgoing
+        if split >= width:
+            return self.incoming
+            
+        if self.style == 'wipe':
+            # Incoming screen revealed left to right
+            self.scratch.paste(self.outgoing, (0, 0))
+            self.scratch.paste(self.incoming.crop((0, 0, split, height)), (0, 0))
+        else:
+            # Slide: outgoing moves left, incoming follows in from the right
+            self.scratch.paste(self.outgoing.crop((split, 0, width, height)), (0, 0))
+            self.scratch.paste(self.incoming.crop((0, 0, split, height)), (width - split, 0))
+        return self.scratch
+
+
 class MatrixDisplay:
-    def __init__(self, matrix):
+    """Composes each frame into an RGB image and blits it to the panel in one call"""
+    
+    def __init__(self, matrix, font=FONT_3X5, cache_size=TEXT_CACHE_SIZE, color=None):
         self.matrix = matrix
+        self.color = color or ColorPipeline()
+        self.color_version = None  # Pipeline version of the frame on the panel
         self.canvas = matrix.CreateFrameCanvas()
+        self.width = MATRIX_WIDTH
+        self.height = MATRIX_HEIGHT
+        self.frame = Image.new('RGB', (self.width, self.height))
+        
+        # Whole-number scale that fits the layout on the wall, centred
+        self.scale = max(1, min(matrix.width // self.width, matrix.height // self.height))
+        self.origin = ((matrix.width - self.width * self.scale) // 2, (matrix.height - self.height * self.scale) // 2)
+        self.front_frame = None  # Layout frames last written to each canvas
+        self.back_frame = None
+        self.draw = ImageDraw.Draw(self.frame)
+        self.atlas = build_glyph_atlas(font)
+        self.glyph_height = max(len(char_data) for char_data in font.values())
+        self.text_cache = OrderedDict()
+        self.cache_size = cache_size
+        self.marquee_cache = OrderedDict()  # (text, width) -> (strip, period, start time)
+        self.panel_hash = None  # Fingerprint of the frame currently on the panel
+        self.capturing = False
+        self.scene = None  # Scene drawn most recently
+        self.stream = None  # Optional FrameStream fed every swapped frame
+        self.frames_pushed = 0
+        self.frames_skipped = 0
         
     def clear(self):
-        self.canvas.Clear()
+        self.frame.paste((0, 0, 0), (0, 0, self.width, self.height))
         
     def set_pixel(self, x, y, r, g, b):
-        if 0 <= x < 64 and 0 <= y < 32:
-            self.canvas.SetPixel(x, y, r, g, b)
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.frame.putpixel((x, y), (r, g, b))
             
-    def draw_text(self, text, x, y, r, g, b):
-        """Draw text using 3x5 pixel font"""
-        current_x = x
+    def fill_rect(self, x, y, w, h, r, g, b):
+        """Fill a w x h rectangle with its top-left corner at (x, y)"""
+        if w > 0 and h > 0:
+            self.draw.rectangle((x, y, x + w - 1, y + h - 1), fill=(r, g, b))
+            
+    def draw_rect(self, x, y, w, h, r, g, b):
+        """Draw a 1px rectangle outline with its top-left corner at (x, y)"""
+        if w > 0 and h > 0:
+            self.draw.rectangle((x, y, x + w - 1, y + h - 1), outline=(r, g, b))
+            
+    def render_text(self, text):
+        """Return (mask image, width) for text, cached so repeat labels are one paste"""
+        rendered = self.text_cache.get(text)
+        if rendered is not None:
+            self.text_cache.move_to_end(text)
+            return rendered
+            
+        offsets = []
+        width = 0
         for char in text.upper():
-            if char in FONT_3X5:
-                char_data = FONT_3X5[char]
-                for row in range(len(char_data)):
-                    for col in range(len(char_data[row])):
-                        if char_data[row][col] == 1:
-                            self.set_pixel(current_x + col, y + row, r, g, b)
-                current_x += len(char_data[0]) + 1  # Character width + 1px spacing
+            glyph = self.atlas.get(char)
+            if glyph:
+                pixels, advance = glyph
+                offsets.extend((width + dx, dy) for dx, dy in pixels)
+                width += advance
+                
+        mask = None
+        if offsets:
+            mask = Image.new('1', (width, self.glyph_height))
+            for pixel in offsets:
+                mask.putpixel(pixel, 1)
                 
+        rendered = (mask, width)
+        self.text_cache[text] = rendered
+        if len(self.text_cache) > self.cache_size:
+            self.text_cache.popitem(last=False)
+        return rendered
+        
+    def draw_text(self, text, x, y, r, g, b):
+        """Draw text using 3x5 pixel font"""
+        mask, width = self.render_text(text)
+        if mask is not None:
+            # PIL clips the paste to the frame, so partly off-screen text is fine
+            self.frame.paste((r, g, b), (x, y), mask)
+        return width
+        
+    def marquee_window(self, text, width, now=None):
+        """(mask, scroll offset) for the visible part of a marquee; offset is None if it fits
+        
+        The text is rendered once into an off-screen strip; each frame is
+        one crop, however long the text is. The scroll position follows the
+        clock, not the frame count, so speed is the same at any frame rate.
+        """
+        mask, text_width = self.render_text(text)
+        if mask is None or text_width - 1 <= width:  # Last column is inter-character spacing
+            return mask, None
+            
+        now = time.monotonic() if now is None else now
+        strip, period, started = self.marquee_strip(text, width, mask, text_width, now)
+        offset = int((now - started) * MARQUEE_SPEED) % period
+        return strip.crop((offset, 0, offset + width, self.glyph_height)), offset
+        
+    def marquee_next_step(self, text, width, now):
+        """Monotonic time a scrolling marquee next moves by a pixel"""
+        entry = self.marquee_cache.get((text, width))
+        if entry is None:
+            return now
+        started = entry[2]
+        return started + (int((now - started) * MARQUEE_SPEED) + 1) / MARQUEE_SPEED
+        
+    def marquee_strip(self, text, width, mask, text_width, now):
+        key = (text, width)
+        entry = self.marquee_cache.get(key)
+        if entry is not None:
+            self.marquee_cache.move_to_end(key)
+            return entry
+            
+        # Text, gap, then the start of the text again, so every window is one crop
+        period = text_width + MARQUEE_GAP
+        strip = Image.new('1', (period + width, self.glyph_height))
+        strip.paste(mask, (0, 0))
+        strip.paste(mask, (period, 0))
+        
+        entry = (strip, period, now)
+        self.marquee_cache[key] = entry
+        if len(self.marquee_cache) > MARQUEE_CACHE_SIZE:
+            self.marquee_cache.popitem(last=False)
+        return entry
+        
+    def capture(self, render):
+        """Run a screen's render() into an off-screen frame and return it"""
+        frame, draw = self.frame, self.draw
+        self.frame = Image.new('RGB', (self.width, self.height))
+        self.draw = ImageDraw.Draw(self.frame)
+        self.capturing = True
+        try:
+            render()
+            return self.frame
+        finally:
+            self.frame, self.draw = frame, draw
+            self.capturing = False
+            
+    def next_change(self, now):
+        """Monotonic time the panel next changes by itself (animation, countdown, brightness schedule), or None"""
+        times = [self.scene.next_change(now) if self.scene is not None else now]
+        delay = self.color.idle_for()
+        if delay is not None:
+            times.append(now + delay)
+        times = [t for t in times if t is not None]
+        return min(times) if times else None
+        
+    def transition_to(self, render, style=TRANSITION_STYLE, duration=TRANSITION_DURATION, start=None):
+        """Start a transition from the current frame to what render() draws"""
+        return Transition(self.frame.copy(), self.capture(render), style, duration, start)
+        
+    def show_frame(self, image):
+        """Show a fully composed image (e.g. a transition step)"""
+        self.frame.paste(image, (0, 0))
+        return self.show()
+        
     def show(self):
+        """Push the frame to the panel, skipping the swap if nothing changed"""
+        if self.capturing:
+            return False  # Off-screen render; the caller takes the frame
+            
+        self.color.tick()
+        if self.color.version != self.color_version:
+            # New colours: both canvases need a full re-blit of the same frame
+            self.color_version = self.color.version
+            self.panel_hash = self.front_frame = self.back_frame = None
+            
+        frame_hash = zlib.crc32(self.frame.tobytes())
+        if frame_hash == self.panel_hash:
+            self.frames_skipped += 1
+            return False
+            
+        swap_start = time.perf_counter()
+        self.blit()
         self.canvas = self.matrix.SwapOnVSync(self.canvas)
+        metrics.frame_swap.observe(time.perf_counter() - swap_start)
+        self.front_frame, self.back_frame = self.frame.copy(), self.front_frame
+        self.panel_hash = frame_hash
+        self.frames_pushed += 1
+        if self.stream:
+            self.stream.publish(self.frame)
+        return True
+        
+    def dirty_boxes(self):
+        """Boxes (per TILE_ROWS band) where the frame differs from the back canvas
+        
+        The back canvas still holds the frame from two swaps ago, so that
+        is what each band is compared against.
+        """
+        if self.back_frame is None:
+            return [(0, 0, self.width, self.height)]
+            
+        diff = ImageChops.difference(self.frame, self.back_frame)
+        boxes = []
+        for top in range(0, self.height, TILE_ROWS):
+            box = diff.crop((0, top, self.width, min(self.height, top + TILE_ROWS))).getbbox()
+            if box:
+                boxes.append((box[0], top + box[1], box[2], top + box[3]))
+        return boxes
+        
+    def blit(self):
+        """Scale the changed bands of the frame onto the back canvas"""
+        x0, y0 = self.origin
+        scale = self.scale
+        for box in self.dirty_boxes():
+            region = self.frame.crop(box) if box != (0, 0, self.width, self.height) else self.frame
+            region = self.color.apply(region)
+            if scale != 1:
+                region = region.resize((region.width * scale, region.height * scale), Image.NEAREST)
+            self.canvas.SetImage(region, x0 + box[0] * scale, y0 + box[1] * scale)
+            
+    def frame_stats(self):
+        return {
+            'pushed': self.frames_pushed,
+            'skipped': self.frames_skipped,
+            'panel': f"{self.matrix.width}x{self.matrix.height}",
+            'scale': self.scale
+        }
+
+
+def resolve(value):
+    return value() if callable(value) else value
+
+
+class Widget:
+    """A piece of a screen that is repainted only when its look changes
+    
+    look() returns a comparable description of what the widget would
+    draw now (None when hidden); paint() draws that look and returns the
+    box it covers.
+    """
+    
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.painted = None  # Look currently in the scene image
+        self.box = None
+        
+    def next_change(self, display, now):
+        """Monotonic time the look changes by itself (not from new data), or None"""
+        return None
+
+
+class Text(Widget):
+    """Text at a fixed position; text and color may be callables bound to screen data"""
+    
+    def __init__(self, x, y, text, color):
+        super().__init__(x, y)
+        self.text = text
+        self.color = color
+        
+    def look(self, display, now):
+        text = resolve(self.text)
+        return None if text is None else (text, resolve(self.color))
+        
+    def paint(self, display, image, look, now):
+        text, color = look
+        mask, width = display.render_text(text)
+        if mask is None:
+            return None
+        image.paste(color, (self.x, self.y), mask)
+        return (self.x, self.y, self.x + width, self.y + display.glyph_height)
+
+
+class Marquee(Text):
+    """Text in a fixed-width box, scrolling if it doesn't fit; repaints only while moving"""
+    
+    def __init__(self, x, y, width, text, color):
+        super().__init__(x, y, text, color)
+        self.width = width
+        
+    def look(self, display, now):
+        text = resolve(self.text)
+        if text is None:
+            return None
+        window, offset = display.marquee_window(text, self.width, now)
+        return (text, resolve(self.color), offset)
+        
+    def next_change(self, display, now):
+        if self.painted is None or self.painted[2] is None:
+            return None  # Hidden or fits without scrolling
+        return display.marquee_next_step(self.painted[0], self.width, now)
+        
+    def paint(self, display, image, look, now):
+        text, color, offset = look
+        window, offset = display.marquee_window(text, self.width, now)
+        if window is None:
+            return None
+        image.paste(color, (self.x, self.y), window)
+        return (self.x, self.y, self.x + self.width, self.y + display.glyph_height)
+
+
+class Marker(Widget):
+    """Single pixel shown while visible() is true (e.g. the stale-data dot)"""
+    
+    def __init__(self, x, y, color, visible):
+        super().__init__(x, y)
+        self.color = color
+        self.visible = visible
+        
+    def look(self, display, now):
+        return self.color if self.visible() else None
+        
+    def paint(self, display, image, look, now):
+        image.putpixel((self.x, self.y), look)
+        return (self.x, self.y, self.x + 1, self.y + 1)
+
+
+class Scene:
+    """Retained widgets for one screen, composed into the screen's own image
+    
+    Each frame, widgets whose look (text, color, scroll offset) hasn't
+    changed are left alone. Changed widgets have their old box erased and
+    are repainted, along with any widget overlapping an erased box. The
+    finished image is then pasted onto the frame in one call.
+    """
+    
+    def __init__(self, display, widgets, clock=None):
+        self.display = display
+        self.widgets = widgets
+        self.clock = clock  # Optional callable: seconds until bound data changes by itself
+        self.image = Image.new('RGB', (display.width, display.height))
+        self.repaints = 0
+        
+    def next_change(self, now):
+        """Monotonic time something on this scene changes without new data, or None"""
+        times = [widget.next_change(self.display, now) for widget in self.widgets]
+        if self.clock is not None:
+            delay = self.clock()
+            times.append(None if delay is None else now + delay)
+        times = [t for t in times if t is not None]
+        return min(times) if times else None
+        
+    def render(self, now=None):
+        now = time.monotonic() if now is None else now
+        self.display.scene = self  # What the idle loop asks for its next change
+        changed = []
+        for widget in self.widgets:
+            look = widget.look(self.display, now)
+            if look != widget.painted:
+                changed.append((widget, look))
+                
+        if changed:
+            erased = [widget.box for widget, look in changed if widget.box]
+            for box in erased:
+                self.image.paste((0, 0, 0), box)
+            looks = {id(widget): look for widget, look in changed}
+            
+            for widget in self.widgets:
+                if id(widget) in looks:
+                    widget.painted = look = looks[id(widget)]
+                elif widget.box and any(overlaps(widget.box, box) for box in erased):
+                    look = widget.painted
+                else:
+                    continue
+                widget.box = None
+                if look is not None:
+                    widget.box = widget.paint(self.display, self.image, look, now)
+                    self.repaints += 1
+                    
+        self.display.frame.paste(self.image, (0, 0))
+        self.display.show()
+
+
+def overlaps(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def loading_scene(display):
+    return Scene(display, [Text(8, 12, 'LOADING', (255, 255, 0))])
+
+
+class HttpClient:
+    """Shared keep-alive session for every fetcher
+    
+    Connections are pooled per host, at most pool_maxsize each, so repeat
+    fetches skip the TCP+TLS handshake, responses are gzip-compressed,
+    and URLs that hand out an ETag or Last-Modified are revalidated with a
+    conditional GET so an unchanged payload costs a 304 instead of a full
+    download.
+    """
+    
+    def __init__(self, pool_maxsize=2, timeout=10):
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        self.adapter = None
+        self.session = None
+        self.validators = {}  # url -> (etag, last_modified, data, body size)
+        self.counters = {'requests': 0, 'not_modified': 0, 'bytes_received': 0, 'bytes_saved': 0}
+        self.lock = threading.Lock()
+        
+    def connect(self):
+        """Create the pooled session on first use; importing requests is slow on a Pi Zero"""
+        with self.lock:
+            if self.session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                
+                # pool_block: a third concurrent request to one host waits for a free
+                # connection instead of opening an extra one outside the pool
+                self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_maxsize, pool_block=True)
+                session = requests.Session()
+                session.mount('https://', self.adapter)
+                session.mount('http://', self.adapter)
+                session.headers['Accept-Encoding'] = 'gzip, deflate'
+                self.session = session
+        return self.session
+        
+    def get_json(self, url, timeout=None, headers=None):
+        return self.get(url, lambda response: response.json(), timeout, headers)
+        
+    def get_bytes(self, url, timeout=None, headers=None):
+        return self.get(url, lambda response: response.content, timeout, headers)
+        
+    def get(self, url, parse, timeout=None, headers=None):
+        """GET url and return parse(response), or the cached result on a 304"""
+        headers = dict(headers or {})
+        cached = self.validators.get(url)
+        if cached:
+            etag, last_modified = cached[0], cached[1]
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+                
+        session = self.session or self.connect()
+        response = session.get(url, headers=headers, timeout=timeout or self.timeout)
+        
+        if response.status_code == 304 and cached:
+            with self.lock:
+                self.counters['requests'] += 1
+                self.counters['not_modified'] += 1
+                self.counters['bytes_saved'] += cached[3]
+            return cached[2]
+            
+        response.raise_for_status()
+        data = parse(response)
+        
+        body_size = len(response.content)
+        wire_size = response.raw.tell() or body_size  # Compressed bytes actually read
+        with self.lock:
+            self.counters['requests'] += 1
+            self.counters['bytes_received'] += wire_size
+            self.counters['bytes_saved'] += max(0, body_size - wire_size)
+            
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            self.validators[url] = (etag, last_modified, data, body_size)
+        return data
+        
+    def stats(self):
+        """Request/byte counters plus per-host connection reuse from the pool"""
+        hosts = {}
+        pools = self.adapter.poolmanager.pools if self.adapter else {}
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = hosts.setdefault(pool.host, {'connections': 0, 'requests': 0})
+            host['connections'] += pool.num_connections
+            host['requests'] += pool.num_requests
+            
+        for host in hosts.values():
+            host['reused'] = max(0, host['requests'] - host['connections'])
+            
+        with self.lock:
+            return dict(self.counters, hosts=hosts)
+
+
+# One pooled client shared by all screens
+http_client = HttpClient()
+
+
+WEATHER_URL = 'https://wttr.in/10038?format=j1'
 
 
 class WeatherDisplay:
-    def __init__(self, display):
+    # wttr.in barely changes within 10 minutes
+    refresh_ttl = 600
+    refresh_priority = 1
+    refresh_jitter = 60
+    cache_max_age = 3 * 3600
+    
+    def __init__(self, display, url=WEATHER_URL, client=None):
         self.display = display
+        self.url = url
+        self.client = client or http_client
         self.weather = None
+        self.stale = False
+        self.updated_at = None
+        
+        self.loading = loading_scene(display)
+        self.scene = Scene(display, [
+            # Row 0-4: NYC + Temperature
+            Text(1, 0, 'NYC', (100, 180, 255)),
+            Text(18, 0, lambda: f"{self.weather['temp']}F", (255, 220, 180)),
+            # Row 6-10: Condition (scrolls if it's wider than the panel)
+            Marquee(2, 6, 62, lambda: self.get_short_condition(self.weather['condition']), (200, 200, 255)),
+            # Row 12-16: Feels like
+            Text(2, 12, 'FEELS', (150, 170, 190)),
+            Text(26, 12, lambda: f"{self.weather['feelsLike']}F", (200, 180, 160)),
+            # Row 18-22: Humidity
+            Text(2, 18, 'HUMIDITY', (100, 200, 255)),
+            Text(40, 18, lambda: f"{self.weather['humidity']}%", (150, 220, 255)),
+            Marker(display.width - 1, display.height - 1, STALE_COLOR, lambda: self.stale)
+        ])
         
     def fetch_weather(self):
         """Fetch weather from wttr.in API"""
         try:
-            response = requests.get('https://wttr.in/10038?format=j1', timeout=10)
-            data = response.json()
+            data = self.client.get_json(self.url)
             
             self.weather = {
                 'temp': round(float(data['current_condition'][0]['temp_F'])),
@@ -113,41 +702,26 @@ class WeatherDisplay:
                 'feelsLike': round(float(data['current_condition'][0]['FeelsLikeF'])),
                 'weatherCode': data['current_condition'][0]['weatherCode']
             }
+            self.stale = False
             print(f"✅ Weather: {self.weather['temp']}°F - {self.weather['condition']}")
             return True
         except Exception as e:
             print(f"❌ Weather fetch error: {e}")
-            self.weather = {'temp': '--', 'condition': 'Error', 'humidity': '--', 'feelsLike': '--'}
+            if self.weather:
+                self.stale = True
+            else:
+                self.weather = {'temp': '--', 'condition': 'Error', 'humidity': '--', 'feelsLike': '--'}
             return False
             
-    def render(self):
-        self.display.clear()
-        
-        if not self.weather:
-            self.display.draw_text('LOADING', 8, 12, 255, 255, 0)
-            self.display.show()
-            return
-            
-        # Row 0-4: NYC + Temperature
-        self.display.draw_text('NYC', 1, 0, 100, 180, 255)
-        temp_str = f"{self.weather['temp']}F"
-        self.display.draw_text(temp_str, 18, 0, 255, 220, 180)
-        
-        # Row 6-10: Condition
-        condition = self.get_short_condition(self.weather['condition'])
-        self.display.draw_text(condition, 2, 6, 200, 200, 255)
+    def snapshot(self):
+        return self.weather
         
-        # Row 12-16: Feels like
-        self.display.draw_text('FEELS', 2, 12, 150, 170, 190)
-        feels_str = f"{self.weather['feelsLike']}F"
-        self.display.draw_text(feels_str, 26, 12, 200, 180, 160)
+    def restore(self, weather):
+        self.weather = weather
+        self.stale = True
         
-        # Row 18-22: Humidity
-        self.display.draw_text('HUMIDITY', 2, 18, 100, 200, 255)
-        hum_str = f"{self.weather['humidity']}%"
-        self.display.draw_text(hum_str, 40, 18, 150, 220, 255)
-        
-        self.display.show()
+    def render(self):
+        (self.scene if self.weather else self.loading).render()
         
     def get_short_condition(self, condition):
         mapping = {
@@ -167,191 +741,747 @@ class WeatherDisplay:
         for key, value in mapping.items():
             if key in condition:
                 return value
-        return condition[:10].upper()
+        return condition.upper()
 
 
 class MLBDisplay:
-    def __init__(self, display):
+    # Standings only move a few times a day
+    refresh_ttl = 3600
+    refresh_priority = 2
+    refresh_jitter = 300
+    cache_max_age = 2 * 86400
+    
+    def __init__(self, display, url=STANDINGS_URL, client=None, division=DIVISION):
         self.display = display
-        self.standings = None
+        self.url = url  # May hold a {season} placeholder, filled in on every fetch
+        self.client = client or http_client
+        self.division = division
+        self.divisions = {}  # Division id -> teams, for every division in the last payload
+        self.standings = None  # Teams of the division shown
+        self.stale = False
+        self.updated_at = None
+        
+        # Row 0-4: Title, then teams at rows 6, 12, 18, 24 (1st place in green)
+        widgets = [Text(22, 0, lambda: DIVISIONS[self.division][0], (255, 100, 100))]
+        for idx, y in enumerate([6, 12, 18, 24]):
+            color = (100, 255, 100) if idx == 0 else (180, 180, 200)
+            widgets += [
+                Text(1, y, lambda idx=idx: self.team_field(idx, 'name'), color),
+                Text(18, y, lambda idx=idx: self.team_field(idx, 'wins'), (100, 200, 255)),
+                Text(32, y, lambda idx=idx: self.team_field(idx, 'losses'), (255, 150, 100)),
+                Text(46, y, lambda idx=idx: self.games_back(idx), (200, 200, 100))
+            ]
+        widgets.append(Marker(display.width - 1, display.height - 1, STALE_COLOR, lambda: self.stale))
+        
+        self.loading = loading_scene(display)
+        self.scene = Scene(display, widgets)
         
     def fetch_standings(self):
-        """Fetch MLB NL East standings"""
+        """Fetch this season's standings for both leagues and index them by division"""
         try:
-            response = requests.get(
-                'https://statsapi.mlb.com/api/v1/standings?leagueId=104&season=2024&standingsTypes=regularSeason',
-                timeout=10
-            )
-            data = response.json()
-            
-            # Find NL East (division ID 204)
-            nl_east = next((r for r in data['records'] if r['division']['id'] == 204), None)
-            
-            if nl_east:
-                self.standings = []
-                for team in nl_east['teamRecords'][:4]:
-                    self.standings.append({
-                        'name': self.get_team_abbr(team['team']['name']),
-                        'wins': team['wins'],
-                        'losses': team['losses'],
-                        'gb': team['gamesBack']
-                    })
-                print(f"✅ MLB: {len(self.standings)} teams loaded")
+            url = self.url.format(season=current_season())
+            # Parsed inside get() so a 304 hands back the already-built index
+            divisions = self.client.get(url, lambda response: parse_standings(response.content.decode()))
+            
+            if self.division in divisions:
+                # Publish the whole index at once so render() never sees half of it
+                self.divisions = divisions
+                self.standings = divisions[self.division][:4]
+                self.stale = False
+                print(f"✅ MLB: {sum(map(len, divisions.values()))} teams in {len(divisions)} divisions loaded")
                 return True
+            print(f"❌ MLB: division {self.division} not in standings")
         except Exception as e:
             print(f"❌ MLB fetch error: {e}")
-            self.standings = None
-            return False
+        self.stale = self.standings is not None
+        return False
             
-    def get_team_abbr(self, team_name):
-        abbrs = {
-            'Atlanta Braves': 'ATL',
-            'New York Mets': 'NYM',
-            'Philadelphia Phillies': 'PHI',
-            'Miami Marlins': 'MIA',
-            'Washington Nationals': 'WSH'
-        }
-        return abbrs.get(team_name, team_name[:3].upper())
+    def show_division(self, division):
+        """Switch to another division from the last payload, without refetching"""
+        if division not in DIVISIONS:
+            raise ValueError(f"Unknown division: {division}")
+        self.division = division
+        self.standings = self.divisions[division][:4] if division in self.divisions else None
+        
+    def snapshot(self):
+        return self.divisions
+        
+    def restore(self, divisions):
+        if isinstance(divisions, list):  # Cached before the division index: NL East only
+            divisions = {204: divisions}
+        self.divisions = {int(division): tuple(teams) for division, teams in divisions.items()}
+        self.standings = self.divisions[self.division][:4] if self.division in self.divisions else None
+        self.stale = True
+        
+    def team_field(self, idx, key):
+        if idx < len(self.standings):
+            return str(self.standings[idx][key])
+        return None
+        
+    def games_back(self, idx):
+        """Games back for teams behind the leader, else None"""
+        gb = self.team_field(idx, 'gb')
+        if idx > 0 and gb not in [None, '-', '0.0'] and float(gb) > 0:
+            return gb
+        return None
         
     def render(self):
-        self.display.clear()
+        (self.scene if self.standings else self.loading).render()
+
+
+# Uptown A trains at Fulton St. GTFS platform IDs end in N (uptown) or S (downtown)
+SUBWAY_ROUTE = 'A'
+SUBWAY_STOP = 'A38N'
+
+# Departures kept per fetch, so later trains can move up as earlier ones leave
+MAX_TRAINS = 8
+
+TRANSITER_URL = 'https://demo.transiter.dev/systems/us-ny-subway/stops/A38'
+# Parent stop IDs of the A's terminals, for the realtime feed's bare stop IDs
+TERMINAL_NAMES = {
+    'A02': 'Inwood-207 St',
+    'A55': 'Euclid Av',
+    'A65': 'Ozone Park-Lefferts Blvd',
+    'H11': 'Far Rockaway',
+    'H15': 'Rockaway Park',
+}
+
+GTFS_RT_URL = 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-ace'
+
+
+class TransiterFeed:
+    """Reads Transiter's stop JSON directly; the CORS proxy is only needed in a browser
+    
+    Point url at a local server to replay recorded responses.
+    """
+    
+    def __init__(self, url=TRANSITER_URL, client=None):
+        self.url = url
+        self.client = client or http_client
         
-        if not self.standings:
-            self.display.draw_text('LOADING', 8, 12, 255, 255, 0)
-            self.display.show()
-            return
+    def departures(self, routes):
+        """Return {platform stop ID: [(departure time, route ID, destination), ...]} sorted by time"""
+        data = self.client.get_json(self.url)
+        parent = data.get('id', '')
+        index = {}
+        
+        for st in data.get('stopTimes', ()):
+            trip = st.get('trip') or {}
+            route = (trip.get('route') or {}).get('id')
+            destination = (trip.get('destination') or {}).get('name') or st.get('headsign') or ''
+            event = st.get('departure') or st.get('arrival')
+            if route not in routes or not event or not event.get('time'):
+                continue
+                
+            stop_id = st.get('stop', {}).get('id')
+            if not stop_id:
+                stop_id = parent + ('N' if 'Uptown' in st.get('headsign', '') else 'S')
+            index.setdefault(stop_id, []).append((int(event['time']), route, destination))
             
-        # Row 0-4: Title
-        self.display.draw_text('NL EAST', 22, 0, 255, 100, 100)
+        for departures in index.values():
+            departures.sort()
+        return index
+
+
+class GtfsRealtimeFeed:
+    """Reads the MTA GTFS-realtime protobuf feed directly
+    
+    Needs `pip install gtfs-realtime-bindings protobuf`. Only trip updates
+    for the requested routes and stops are walked.
+    """
+    
+    def __init__(self, url=GTFS_RT_URL, stops=(SUBWAY_STOP,), api_key=None, client=None):
+        from google.transit import gtfs_realtime_pb2  # Optional dependency
         
-        # Teams at rows: 6, 12, 18, 24
-        y_positions = [6, 12, 18, 24]
+        self.pb2 = gtfs_realtime_pb2
+        self.url = url
+        self.stops = frozenset(stops)
+        self.headers = {'x-api-key': api_key} if api_key else {}
+        self.client = client or http_client
         
-        for idx, team in enumerate(self.standings[:4]):
-            y = y_positions[idx]
-            
-            # Color: Green for 1st place, gray for others
-            if idx == 0:
-                color = (100, 255, 100)
-            else:
-                color = (180, 180, 200)
+    def departures(self, routes):
+        """Return {platform stop ID: [(departure time, route ID, destination), ...]} sorted by time"""
+        feed = self.pb2.FeedMessage()
+        feed.ParseFromString(self.client.get_bytes(self.url, headers=self.headers))
+        index = {}
+        
+        for entity in feed.entity:
+            if not entity.HasField('trip_update'):
+                continue
+            trip_update = entity.trip_update
+            route = trip_update.trip.route_id
+            if route not in routes:
+                continue
                 
-            # Team name
-            self.display.draw_text(team['name'], 1, y, *color)
-            
-            # Wins
-            self.display.draw_text(str(team['wins']), 18, y, 100, 200, 255)
-            
-            # Losses
-            self.display.draw_text(str(team['losses']), 32, y, 255, 150, 100)
-            
-            # Games back
-            if idx > 0 and team['gb'] not in ['-', '0.0']:
-                gb = float(team['gb'])
-                if gb > 0:
-                    self.display.draw_text(str(team['gb']), 46, y, 200, 200, 100)
+            # Realtime trips carry no headsign; the last stop listed is where the train ends
+            updates = trip_update.stop_time_update
+            terminal = updates[-1].stop_id[:-1] if updates else ''
+            destination = TERMINAL_NAMES.get(terminal, terminal)
+            for update in updates:
+                if update.stop_id not in self.stops:
+                    continue
+                event = update.departure if update.HasField('departure') else update.arrival
+                if event.time:
+                    index.setdefault(update.stop_id, []).append((event.time, route, destination))
                     
-        self.display.show()
+        for departures in index.values():
+            departures.sort()
+        return index
 
 
 class SubwayDisplay:
-    def __init__(self, display):
+    # Countdowns are recomputed every frame from departure times, so the feed
+    # only needs refreshing for delays; subway data still comes first
+    refresh_ttl = 60
+    refresh_priority = 0
+    refresh_jitter = 3
+    cache_max_age = 10 * 60
+    
+    def __init__(self, display, feed=None):
         self.display = display
+        self.feed = feed or TransiterFeed()
         self.trains = None
+        self.stale = False
+        self.updated_at = None
+        self.shown = []  # upcoming() as of the frame being rendered
+        
+        # Row 0-4: Header, then trains at rows 6, 12, 18, 24
+        widgets = [
+            Text(1, 0, 'A TRAIN', (0, 100, 255)),
+            Text(34, 0, 'FULTON', (200, 200, 220)),
+            Text(8, 6, lambda: None if self.shown else 'NO TRAINS', (200, 200, 200))
+        ]
+        for idx, y in enumerate([6, 12, 18, 24]):
+            widgets += [
+                Text(1, y, lambda idx=idx: str(idx + 1) if idx < len(self.shown) else None, (150, 150, 200)),
+                Text(8, y, lambda idx=idx: self.minutes_text(idx), lambda idx=idx: self.urgency_color(idx)),
+                Marquee(32, y, 32, lambda idx=idx: self.shown[idx][1]['destination'] if idx < len(self.shown) else None, (180, 180, 200))
+            ]
+        widgets.append(Marker(display.width - 1, display.height - 1, STALE_COLOR, lambda: self.stale))
+        
+        self.loading = loading_scene(display)
+        self.scene = Scene(display, widgets, clock=self.next_countdown)
         
     def fetch_trains(self):
-        """Fetch A train times from Transiter API"""
+        """Fetch uptown A train times straight from the subway feed"""
         try:
-            # Use CORS proxy
-            url = 'https://demo.transiter.dev/systems/us-ny-subway/stops/A38'
-            proxied_url = f'https://api.allorigins.win/get?url={requests.utils.quote(url)}'
-            
-            response = requests.get(proxied_url, timeout=10)
-            proxy_data = response.json()
-            data = json.loads(proxy_data['contents'])
+            index = self.feed.departures({SUBWAY_ROUTE})
+            now = time.time()
             
-            all_trains = []
+            # Index is already sorted by time; keep a few spares beyond the 4 rows shown
+            trains = tuple(
+                {'departure': departure, 'destination': destination or 'UPTOWN'}
+                for departure, route, destination in index.get(SUBWAY_STOP, ())
+                if departure > now and int((departure - now) / 60) < 30
+            )[:MAX_TRAINS]
             
-            if 'stopTimes' in data:
-                for st in data['stopTimes']:
-                    route = st.get('trip', {}).get('route', {}).get('id')
-                    headsign = st.get('headsign', '')
-                    
-                    # Filter for uptown A trains
-                    if route == 'A' and 'Uptown' in headsign and 'departure' in st:
-                        departure_time = st['departure']['time']
-                        now = time.time()
-                        minutes_away = int((departure_time - now) / 60)
-                        
-                        if 0 <= minutes_away < 30:
-                            all_trains.append({
-                                'minutes': minutes_away,
-                                'destination': 'UPTOWN'
-                            })
-                            
-            # Sort by time and take first 4
-            self.trains = sorted(all_trains, key=lambda x: x['minutes'])[:4]
-            
-            if not self.trains:
-                self.trains = [{'minutes': None, 'destination': 'NO TRAINS'}]
+            if not trains:
+                trains = ({'departure': None, 'destination': 'NO TRAINS'},)
                 
-            print(f"✅ Subway: {len([t for t in self.trains if t['minutes'] is not None])} trains")
+            self.trains = trains
+            self.stale = False
+            
+            print(f"✅ Subway: {len([t for t in self.trains if t['departure'] is not None])} trains")
             return True
         except Exception as e:
             print(f"❌ Subway fetch error: {e}")
-            self.trains = [{'minutes': None, 'destination': 'ERROR'}]
+            if self.trains:
+                self.stale = True
+            else:
+                self.trains = ({'departure': None, 'destination': 'ERROR'},)
             return False
             
-    def render(self):
-        self.display.clear()
+    def snapshot(self):
+        return self.trains
+        
+    def restore(self, trains):
+        # Entries cached before departure times were stored can't be recomputed
+        self.trains = tuple(t for t in trains if 'departure' in t)
+        self.stale = True
+        
+    def upcoming(self, now=None):
+        """Next 4 trains as (minutes, train), recomputed against the local clock
+        
+        Trains that have left drop off and later ones move up in place.
+        """
+        now = time.time() if now is None else now
+        trains = []
+        for train in self.trains:
+            if train['departure'] is None or train['departure'] <= now:
+                continue  # Gone; int() would round the last minute up to NOW
+            trains.append((int((train['departure'] - now) / 60), train))
+            if len(trains) == 4:
+                break
+        return trains
         
+    def next_countdown(self):
+        """Seconds until a shown countdown ticks down a minute (or a train leaves)
+        
+        Every shown train is still to come, so the remainder below is the time
+        to its next whole minute, which for the last minute is its departure.
+        """
+        now = time.time()
+        delays = [(train['departure'] - now) % 60 for minutes, train in self.shown]
+        return min(delays) + 0.001 if delays else None
+        
+    def minutes_text(self, idx):
+        if idx >= len(self.shown):
+            return None
+        minutes = self.shown[idx][0]
+        return 'NOW' if minutes == 0 else f"{minutes}M"
+        
+    def urgency_color(self, idx):
+        minutes = self.shown[idx][0] if idx < len(self.shown) else None
+        if minutes is None:
+            return None
+        if minutes <= 1:
+            return (255, 50, 50)  # Red
+        if minutes <= 5:
+            return (255, 200, 0)  # Yellow
+        return (100, 255, 100)  # Green
+        
+    def render(self):
         if not self.trains:
-            self.display.draw_text('LOADING', 8, 12, 255, 255, 0)
-            self.display.show()
+            self.loading.render()
             return
+        self.shown = self.upcoming()
+        self.scene.render()
+
+
+class MessageDisplay:
+    """Shows an arbitrary message (e.g. pushed via the web API), scrolling if long"""
+    
+    def __init__(self, display):
+        self.display = display
+        self.message = ''
+        self.scene = Scene(display, [Marquee(0, 13, display.width, lambda: self.message, (255, 255, 255))])
+        
+    def set_message(self, message):
+        self.message = message
+        
+    def render(self):
+        self.scene.render()
+
+
+# Last good data per screen, so a reboot can draw immediately
+CACHE_PATH = os.path.expanduser('~/.cache/matrix-display/snapshots.json')
+
+# Unchanged data is only rewritten this often, to refresh its saved_at on disk
+CACHE_TOUCH_INTERVAL = 3600
+
+
+class SnapshotStore:
+    """Persists each screen's last good snapshot as compact JSON
+    
+    Screens provide snapshot()/restore() and a cache_max_age class
+    attribute, the oldest cached snapshot worth showing on boot. Each
+    screen's updated_at holds the epoch time of the data it shows, whether
+    from a fetch or the cache. stale is set while it shows cached data or
+    keeps the last good data after a failed refresh.
+    
+    Writes go to a temp file that is fsynced and then renamed over the
+    old one, so a power cut leaves either the previous or the new file,
+    never a torn one. Saving data identical to what's on disk only
+    refreshes saved_at in memory, so 304s and quiet feeds don't wear the
+    SD card; the file is rewritten once the on-disk copy is older than
+    touch_after.
+    """
+    
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.entries = {}  # name -> {'saved_at': epoch seconds, 'data': snapshot}
+        self.written_at = {}  # name -> saved_at of the copy on disk
+        self.lock = threading.Lock()
+        
+    def load(self):
+        try:
+            with open(self.path) as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            self.entries = {}
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable cache {self.path}: {e}")
+            self.entries = {}
+        self.written_at = {name: entry.get('saved_at', 0) for name, entry in self.entries.items()}
+        return self.entries
+        
+    def restore(self, screens):
+        """Hand each screen its cached snapshot (marked stale) if it isn't too old"""
+        now = time.time()
+        for name, screen in screens.items():
+            entry = self.entries.get(name)
+            if not entry or entry.get('data') is None:
+                continue
+            age = now - entry['saved_at']
+            if age > screen.cache_max_age:
+                continue
+            screen.restore(entry['data'])
+            screen.updated_at = entry['saved_at']
+            print(f"💾 {name}: restored cached data ({int(age)}s old)")
+            
+    def save(self, name, data, touch_after=CACHE_TOUCH_INTERVAL):
+        now = time.time()
+        data = json.loads(json.dumps(data))  # Same shape as a loaded entry, so the two compare equal
+        with self.lock:
+            entry = self.entries.get(name)
+            unchanged = entry is not None and entry.get('data') == data
+            self.entries[name] = {'saved_at': now, 'data': data}
+            if unchanged and now - self.written_at.get(name, 0) < touch_after:
+                return False
+            for key, value in self.entries.items():
+                self.written_at[key] = value['saved_at']
+            payload = json.dumps(self.entries, separators=(',', ':'))
             
-        # Row 0-4: Header
-        self.display.draw_text('A TRAIN', 1, 0, 0, 100, 255)
-        self.display.draw_text('FULTON', 34, 0, 200, 200, 220)
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            
+            # Make the rename itself durable
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+            return True
+
+
+class DataFetcher:
+    """Runs screen fetches on a worker pool so rendering never waits on the network
+    
+    Each fetch callable publishes its result by assigning a freshly built
+    snapshot to its screen (one attribute store), so render() can read the
+    current snapshot at any time without locking.
+    """
+    
+    def __init__(self, sources, max_workers=None):
+        self.sources = sources  # name -> fetch callable
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or len(sources),
+            thread_name_prefix='fetch'
+        )
+        self.pending = {}
+        self.lock = threading.Lock()
         
-        # Trains at rows: 6, 12, 18, 24
-        y_positions = [6, 12, 18, 24]
+    def refresh(self, *names):
+        """Start fetching the named sources (all if none given) and return immediately
         
-        for idx, train in enumerate(self.trains[:4]):
-            y = y_positions[idx]
+        Returns {name: future} for the fetches actually started.
+        """
+        started = {}
+        with self.lock:
+            for name in names or self.sources:
+                future = self.pending.get(name)
+                if future is not None and not future.done():
+                    continue  # Already in flight
+                future = self.executor.submit(self.run, name)
+                self.pending[name] = started[name] = future
+        return started
+        
+    def run(self, name):
+        """Call one source's fetch, recording its latency and result"""
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = self.sources[name]()
+            ok = bool(result)
+            return result
+        finally:
+            metrics.observe_fetch(name, time.perf_counter() - start, ok)
             
-            if train['minutes'] is None:
-                self.display.draw_text('NO TRAINS', 8, y, 200, 200, 200)
-                continue
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+
+# Retry delays after failed fetches: 10s, 20s, 40s ... capped at 10 minutes
+BACKOFF_BASE = 10
+BACKOFF_MAX = 600
+
+# Standalone rotation: seconds per screen, and how long before its slot
+# the next screen's data is refetched if it would be stale by then
+ROTATION_INTERVAL = 30
+PREFETCH_LEAD = float(os.environ.get('MATRIX_PREFETCH_LEAD', 5))
+
+
+class RefreshScheduler:
+    """Decides when each source is due, from the TTL/priority/jitter its screen declares
+    
+    Each screen class declares its policy as class attributes:
+    refresh_ttl, the seconds a good fetch stays fresh; refresh_priority,
+    where lower values fetch first when several are due; and
+    refresh_jitter, up to that many random extra seconds so requests
+    don't line up. A successful fetch is due again after refresh_ttl plus
+    the jitter. A failed one (exception or falsy return) is retried with
+    exponential backoff instead, so a dead upstream isn't hammered.
+    prefetch() pulls a refresh forward so a screen about to rotate in
+    comes up with fresh data, and shown() records how fresh it really was.
+    """
+    
+    def __init__(self, fetcher, screens, store=None, wake=None):
+        self.fetcher = fetcher
+        self.screens = screens  # name -> screen declaring the refresh_* policy
+        self.store = store  # Optional SnapshotStore that good fetches are saved to
+        self.wake = wake  # Optional Event set when new data lands, so an idle loop redraws
+        self.next_due = {name: 0 for name in screens}
+        self.failures = {name: 0 for name in screens}
+        self.ages = {name: deque(maxlen=20) for name in screens}  # Data age each time the screen came on
+        self.lock = threading.Lock()
+        
+    def poll(self, now=None):
+        """Start every fetch that is due, most important first"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            due = [name for name, due_at in self.next_due.items() if due_at <= now]
+            for name in due:
+                self.next_due[name] = float('inf')  # Rescheduled when the fetch finishes
                 
-            # Color by urgency
-            if train['minutes'] <= 1:
-                color = (255, 50, 50)  # Red
-            elif train['minutes'] <= 5:
-                color = (255, 200, 0)  # Yellow
+        due.sort(key=lambda name: self.screens[name].refresh_priority)
+        for name in due:
+            started = self.fetcher.refresh(name)
+            if name in started:
+                started[name].add_done_callback(lambda future, name=name: self.fetched(name, future))
             else:
-                color = (100, 255, 100)  # Green
+                self.refresh_now(name)  # Someone else's fetch is in flight; check again next poll
                 
-            # Train number
-            self.display.draw_text(str(idx + 1), 1, y, 150, 150, 200)
+    def prefetch(self, name, shows_at, lead=PREFETCH_LEAD):
+        """Make sure name is refetched `lead` seconds before shows_at if it would be stale by then"""
+        with self.lock:
+            due_at = self.next_due[name]
+            if due_at < shows_at and not self.failures[name]:  # Leave backoff alone
+                self.next_due[name] = min(due_at, shows_at - lead)
+                
+    def shown(self, name):
+        """Record the age of name's data as its screen comes on; None if it has none yet"""
+        updated_at = self.screens[name].updated_at
+        age = None if updated_at is None else round(time.time() - updated_at, 1)
+        with self.lock:
+            self.ages[name].append(age)
+        return age
+        
+    def refresh_now(self, name):
+        with self.lock:
+            self.next_due[name] = 0
             
-            # Minutes
-            min_str = 'NOW' if train['minutes'] == 0 else f"{train['minutes']}M"
-            self.display.draw_text(min_str, 8, y, *color)
+    def fetched(self, name, future):
+        screen = self.screens[name]
+        ok = future.exception() is None and bool(future.result())
+        
+        with self.lock:
+            if ok:
+                self.failures[name] = 0
+                screen.updated_at = time.time()
+                delay = screen.refresh_ttl
+            else:
+                self.failures[name] += 1
+                delay = min(BACKOFF_BASE * 2 ** (self.failures[name] - 1), BACKOFF_MAX)
+                print(f"⏳ {name}: retrying in {delay}s (failure {self.failures[name]})")
+            self.next_due[name] = time.monotonic() + delay + random.uniform(0, screen.refresh_jitter)
             
-            # Destination
-            self.display.draw_text('UPTOWN', 32, y, 180, 180, 200)
+        if self.wake is not None:
+            self.wake.set()
             
-        self.display.show()
+        if ok and self.store is not None:
+            try:
+                self.store.save(name, screen.snapshot(), min(CACHE_TOUCH_INTERVAL, screen.cache_max_age / 2))
+            except OSError as e:
+                print(f"⚠️ Could not cache {name}: {e}")
+                
+    def next_poll(self):
+        """Monotonic time the next fetch falls due, or None while all are in flight"""
+        with self.lock:
+            due_at = min(self.next_due.values(), default=float('inf'))
+        return None if due_at == float('inf') else due_at
+        
+    def fresh_share(self, name):
+        """Share of recent showings whose data was within its TTL, or None if never shown"""
+        ages = self.ages[name]
+        if not ages:
+            return None
+        ttl = self.screens[name].refresh_ttl
+        return round(sum(1 for age in ages if age is not None and age <= ttl) / len(ages), 2)
+        
+    def status(self):
+        now = time.monotonic()
+        with self.lock:
+            return {
+                name: {
+                    'next_refresh_in': max(0, round(due_at - now, 1)) if due_at != float('inf') else None,
+                    'failures': self.failures[name],
+                    'age_when_shown': self.ages[name][-1] if self.ages[name] else None,
+                    'fresh_when_shown': self.fresh_share(name)
+                }
+                for name, due_at in self.next_due.items()
+            }
+
+
+class StartupTimer:
+    """Time spent in each startup phase, for the time-to-first-pixel report"""
+    
+    def __init__(self, start=None):
+        self.start = self.last = time.perf_counter() if start is None else start
+        self.phases = {}
+        self.mark('imports')
+        
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = round((now - self.last) * 1000, 1)
+        self.last = now
+        
+    def report(self):
+        total = round((self.last - self.start) * 1000, 1)
+        breakdown = ', '.join(f"{phase} {ms}ms" for phase, ms in self.phases.items())
+        print(f"⏱️ Startup {total}ms: {breakdown}")
+        return total
+
+
+# Render loop rate while something is moving; most frames are unchanged and skip the swap
+TARGET_FPS = 30
+
+# Longest idle sleep, so the loop's heartbeat never goes quiet for long
+IDLE_MAX = 60
+
+
+class FrameClock:
+    """Fixed-timestep frame pacing on the monotonic clock
+    
+    Deadlines sit on a fixed grid (start + n * period), so sleep overshoot
+    never accumulates into drift. When a frame overruns by whole periods
+    those frames are dropped rather than rendered back-to-back to catch up.
+    When nothing on screen can change before `until`, tick() idles until
+    then instead, and the grid restarts when it wakes.
+    """
+    
+    def __init__(self, fps=TARGET_FPS, window=120):
+        self.fps = fps
+        self.period = 1.0 / fps
+        self.next_frame = time.monotonic()
+        self.last_tick = None
+        self.frames = 0
+        self.dropped = 0
+        self.late = 0  # Frames whose work ran past their deadline
+        self.intervals = deque(maxlen=window)  # Recent frame-to-frame times
+        self.wakeups = deque(maxlen=60)  # [minute, wakeups in that minute]
+        
+    def tick(self, wake=None, until=None):
+        """Sleep until the next frame deadline (or `until`, if later) and return the monotonic time
+        
+        If `wake` (a threading.Event) is set during the sleep, return at once
+        and restart the frame grid from now, so commands skip the wait.
+        """
+        self.next_frame += self.period
+        now = time.monotonic()
+        if self.last_tick is not None:
+            metrics.frame_render.observe(now - self.last_tick)  # Work done since the last frame
+            
+        if now > self.next_frame:
+            self.late += 1
+        missed = int((now - self.next_frame) / self.period)
+        if missed > 0:
+            # Overloaded: skip the deadlines already missed and realign to the grid
+            self.dropped += missed
+            self.next_frame += missed * self.period
+            
+        idle = until is not None and until > self.next_frame
+        woken = False
+        delay = min(until, now + IDLE_MAX) - now if idle else self.next_frame - now
+        if delay > 0:
+            if wake is None:
+                time.sleep(delay)
+            else:
+                woken = wake.wait(delay)
+                wake.clear()
+            now = time.monotonic()
+        if woken or idle:
+            self.next_frame = now
+            
+        if self.last_tick is not None and not (woken or idle):  # Only steady frames count as jitter
+            self.intervals.append(now - self.last_tick)
+        self.last_tick = now
+        self.frames += 1
+        
+        minute = int(now // 60)
+        if self.wakeups and self.wakeups[-1][0] == minute:
+            self.wakeups[-1][1] += 1
+        else:
+            self.wakeups.append([minute, 1])
+        return now
+        
+    def wakeups_per_hour(self):
+        """Loop wakeups over the last hour, extrapolated if running for less"""
+        if not self.wakeups:
+            return 0
+        minutes = self.wakeups[-1][0] - self.wakeups[0][0] + 1
+        return round(sum(count for minute, count in self.wakeups) * 60 / minutes)
+        
+    def stats(self):
+        intervals = list(self.intervals)
+        mean = statistics.fmean(intervals) if intervals else 0
+        return {
+            'target_fps': self.fps,
+            'fps': round(1 / mean, 1) if mean else 0,
+            'jitter_ms': round(statistics.pstdev(intervals) * 1000, 2) if intervals else 0,
+            'frames': self.frames,
+            'dropped': self.dropped,
+            'late': self.late,
+            'wakeups_per_hour': self.wakeups_per_hour()
+        }
+
+
+class Command:
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.issued_at = time.perf_counter()
+        self.applied = threading.Event()  # Set once the result is on the panel
+        self.latency = None
+
+
+class CommandQueue:
+    """Commands from API threads, applied by the render thread between frames
+    
+    Only the render thread changes what is on screen, so a command can't
+    race auto-rotation half-way through a frame. submit() wakes the render
+    loop straight away instead of waiting for the next frame deadline.
+    """
+    
+    def __init__(self):
+        self.queue = deque()
+        self.ready = threading.Event()
+        
+    def submit(self, name, **args):
+        command = Command(name, args)
+        self.queue.append(command)
+        self.ready.set()
+        return command
+        
+    def drain(self):
+        commands = []
+        while self.queue:
+            commands.append(self.queue.popleft())
+        return commands
+        
+    def complete(self, commands):
+        """Mark commands as shown; latency runs from submit() to the swapped frame"""
+        now = time.perf_counter()
+        for command in commands:
+            command.latency = now - command.issued_at
+            metrics.command_latency.observe(command.latency)
+            command.applied.set()
 
 
 def main():
     print("🎨 RGB LED Matrix Display Starting...")
     print("Press Ctrl+C to exit")
+    startup = StartupTimer(STARTED_AT)
     
     # Initialize matrix
     matrix = configure_matrix()
     display = MatrixDisplay(matrix)
+    startup.mark('matrix')
     
     # Create displays
     weather = WeatherDisplay(display)
@@ -360,29 +1490,71 @@ def main():
     
     # Current screen
     screens = ['weather', 'mlb', 'subway']
+    renderers = {'weather': weather, 'mlb': mlb, 'subway': subway}
     current_screen = 0
     
+    # Draw the last good data straight away; the first poll revalidates it
+    store = SnapshotStore()
+    store.load()
+    store.restore(renderers)
+    renderers[screens[current_screen]].render()
+    startup.mark('first frame')
+    
+    # Fetch in the background on each source's own schedule;
+    # render() always draws the latest snapshot
+    fetcher = DataFetcher({
+        'weather': weather.fetch_weather,
+        'mlb': mlb.fetch_standings,
+        'subway': subway.fetch_trains
+    })
+    wake = threading.Event()  # Set when a fetch lands, so an idle loop redraws at once
+    scheduler = RefreshScheduler(fetcher, renderers, store, wake=wake)
+    http_client.connect()
+    startup.mark('requests')
+    startup.report()
+    
+    clock = FrameClock(TARGET_FPS)
+    last_rotation = time.monotonic()
+    transition = None
+    
+    print(f"\n📺 Showing: {screens[current_screen]}")
     try:
         while True:
-            screen_name = screens[current_screen]
-            print(f"\n📺 Showing: {screen_name}")
-            
-            if screen_name == 'weather':
-                weather.fetch_weather()
-                weather.render()
-            elif screen_name == 'mlb':
-                mlb.fetch_standings()
-                mlb.render()
-            elif screen_name == 'subway':
-                subway.fetch_trains()
-                subway.render()
+            now = time.monotonic()
+            
+            # Rotate screens every ROTATION_INTERVAL seconds
+            if now - last_rotation >= ROTATION_INTERVAL:
+                current_screen = (current_screen + 1) % len(screens)
+                last_rotation = now
+                stats = clock.stats()
+                print(f"📈 {stats['fps']} fps, jitter {stats['jitter_ms']}ms, {stats['dropped']} dropped, {stats['wakeups_per_hour']} wakeups/h")
+                name = screens[current_screen]
+                age = scheduler.shown(name)
+                print(f"\n📺 Showing: {name} ({'no data' if age is None else f'data {age:.0f}s old'}, {scheduler.fresh_share(name):.0%} fresh on show)")
+                transition = display.transition_to(renderers[name].render)
+                
+            # Have the next screen's data fresh before its slot, then start whatever is due
+            scheduler.prefetch(screens[(current_screen + 1) % len(screens)], last_rotation + ROTATION_INTERVAL)
+            scheduler.poll(now)
+            
+            if transition is not None and not transition.done(now):
+                display.show_frame(transition.frame(now))
+            else:
+                # Redraw every frame so data shows up as soon as its fetch lands;
+                # show() skips the swap while the frame is unchanged
+                transition = None
+                renderers[screens[current_screen]].render()
                 
-            # Rotate screens every 30 seconds
-            time.sleep(30)
-            current_screen = (current_screen + 1) % len(screens)
+            # Between animations, sleep until something visible is due to change
+            until = None
+            if transition is None:
+                times = [display.next_change(now), scheduler.next_poll(), last_rotation + ROTATION_INTERVAL]
+                until = min(t for t in times if t is not None)
+            clock.tick(wake=wake, until=until)
             
     except KeyboardInterrupt:
         print("\n👋 Shutting down...")
+        fetcher.shutdown()
         display.clear()
         display.show()
 
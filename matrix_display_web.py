@@ -5,24 +5,34 @@ API endpoint to change screens remotely
 """
 
 import time
-import requests
-from rgbmatrix import RGBMatrix, RGBMatrixOptions
-import json
-from flask import Flask, jsonify, request
-from flask_cors import CORS
+import base64
 import threading
+from matrix_display import MatrixDisplay, WeatherDisplay, MLBDisplay, SubwayDisplay, MessageDisplay, DataFetcher, RefreshScheduler, SnapshotStore, FrameClock, CommandQueue, StartupTimer, TARGET_FPS, IDLE_MAX, ROTATION_INTERVAL, STARTED_AT, http_client
+from matrix_display import RGBMatrix, RGBMatrixOptions, PANEL_ROWS, PANEL_COLS, PANEL_CHAIN, PANEL_PARALLEL, PIXEL_MAPPER
+from virtual_matrix import VirtualMatrix, virtual_matrix_from_env
+from standings import DIVISIONS
+from color_pipeline import ColorPipeline, THEMES, RGB_SEQUENCE, finite
+from render_process import RENDER_PROCESS, RenderProcess
+from frame_stream import FrameStream
+import metrics
 
 # Matrix Configuration
 def configure_matrix():
+    matrix = virtual_matrix_from_env(PANEL_COLS * PANEL_CHAIN, PANEL_ROWS * PANEL_PARALLEL)
+    if matrix is not None:
+        return matrix
+    if RGBMatrix is None:
+        raise RuntimeError("rgbmatrix is not installed; set MATRIX_BACKEND=virtual to run without a panel")
+        
     options = RGBMatrixOptions()
-    options.led_rgb_sequence = "RBG"  # Swap green and blue channels
-    options.rows = 32
-    options.cols = 64
-    options.chain_length = 1
-    options.parallel = 1
+    options.rows = PANEL_ROWS
+    options.cols = PANEL_COLS
+    options.chain_length = PANEL_CHAIN
+    options.parallel = PANEL_PARALLEL
+    options.pixel_mapper_config = PIXEL_MAPPER
     options.hardware_mapping = 'regular'
     options.gpio_slowdown = 4
-    options.brightness = 60
+    options.brightness = 100  # Dimming happens in the ColorPipeline
     options.pwm_lsb_nanoseconds = 130
     options.disable_hardware_pulsing = True
     
@@ -71,374 +81,368 @@ FONT_3X5 = {
     '%': [[1,0,1],[0,0,1],[0,1,0],[1,0,0],[1,0,1]],
 }
 
-class MatrixDisplay:
-    def __init__(self, matrix):
-        self.matrix = matrix
-        self.canvas = matrix.CreateFrameCanvas()
-        
-    def clear(self):
-        self.canvas.Clear()
-        
-    def set_pixel(self, x, y, r, g, b):
-        if 0 <= x < 64 and 0 <= y < 32:
-            self.canvas.SetPixel(x, y, r, g, b)
-            
-    def draw_text(self, text, x, y, r, g, b):
-        """Draw text using 3x5 pixel font"""
-        current_x = x
-        for char in text.upper():
-            if char in FONT_3X5:
-                char_data = FONT_3X5[char]
-                for row in range(len(char_data)):
-                    for col in range(len(char_data[row])):
-                        if char_data[row][col] == 1:
-                            self.set_pixel(current_x + col, y + row, r, g, b)
-                current_x += len(char_data[0]) + 1
-                
-    def show(self):
-        self.canvas = self.matrix.SwapOnVSync(self.canvas)
+# Global state
+current_screen = 'weather'
+auto_rotate = True
+matrix = None
+display = None
+weather_display = None
+mlb_display = None
+subway_display = None
+message_display = None
+fetcher = None
+scheduler = None
+frame_clock = None
+display_thread = None
+render_process = None
+startup = None
+frame_stream = FrameStream()  # Panel frames for /api/stream viewers
+commands = CommandQueue()  # API -> display thread; only display_loop changes the screen
 
+# How long an API call waits for its change to reach the panel
+COMMAND_TIMEOUT = 1.0
 
-class WeatherDisplay:
-    def __init__(self, display):
-        self.display = display
-        self.weather = None
-        
-    def fetch_weather(self):
-        try:
-            response = requests.get('https://wttr.in/10038?format=j1', timeout=10)
-            data = response.json()
-            
-            self.weather = {
-                'temp': round(float(data['current_condition'][0]['temp_F'])),
-                'condition': data['current_condition'][0]['weatherDesc'][0]['value'],
-                'humidity': data['current_condition'][0]['humidity'],
-                'feelsLike': round(float(data['current_condition'][0]['FeelsLikeF'])),
-            }
-            print(f"✅ Weather: {self.weather['temp']}°F - {self.weather['condition']}")
-            return True
-        except Exception as e:
-            print(f"❌ Weather fetch error: {e}")
-            self.weather = {'temp': '--', 'condition': 'Error', 'humidity': '--', 'feelsLike': '--'}
-            return False
-            
-    def render(self):
-        self.display.clear()
-        
-        if not self.weather:
-            self.display.draw_text('LOADING', 8, 12, 255, 255, 0)
-            self.display.show()
-            return
-            
-        # Row 0-4: NYC + Temperature
-        self.display.draw_text('NYC', 1, 0, 100, 180, 255)
-        temp_str = f"{self.weather['temp']}F"
-        self.display.draw_text(temp_str, 18, 0, 255, 220, 180)
-        
-        # Row 6-10: Condition
-        condition = self.get_short_condition(self.weather['condition'])
-        self.display.draw_text(condition, 2, 6, 200, 200, 255)
-        
-        # Row 12-16: Feels like
-        self.display.draw_text('FEELS', 2, 12, 150, 170, 190)
-        feels_str = f"{self.weather['feelsLike']}F"
-        self.display.draw_text(feels_str, 26, 12, 200, 180, 160)
-        
-        # Row 18-22: Humidity
-        self.display.draw_text('HUMIDITY', 2, 18, 100, 200, 255)
-        hum_str = f"{self.weather['humidity']}%"
-        self.display.draw_text(hum_str, 40, 18, 150, 220, 255)
-        
-        self.display.show()
-        
-    def get_short_condition(self, condition):
-        mapping = {
-            'Sunny': 'SUNNY',
-            'Clear': 'CLEAR',
-            'Partly cloudy': 'PARTLY',
-            'Cloudy': 'CLOUDY',
-            'Overcast': 'OVRCAST',
-            'Mist': 'MISTY',
-            'Light rain': 'LT RAIN',
-            'Rain': 'RAINY',
-            'Heavy rain': 'HVY RAIN',
-            'Snow': 'SNOWY',
-            'Fog': 'FOGGY'
-        }
-        
-        for key, value in mapping.items():
-            if key in condition:
-                return value
-        return condition[:10].upper()
+# Flask app (created by create_app once the panel is lit)
+app = None
 
 
-class MLBDisplay:
-    def __init__(self, display):
-        self.display = display
-        self.standings = None
-        
-    def fetch_standings(self):
-        try:
-            response = requests.get(
-                'https://statsapi.mlb.com/api/v1/standings?leagueId=104&season=2024&standingsTypes=regularSeason',
-                timeout=10
-            )
-            data = response.json()
-            
-            nl_east = next((r for r in data['records'] if r['division']['id'] == 204), None)
-            
-            if nl_east:
-                self.standings = []
-                for team in nl_east['teamRecords'][:4]:
-                    self.standings.append({
-                        'name': self.get_team_abbr(team['team']['name']),
-                        'wins': team['wins'],
-                        'losses': team['losses'],
-                        'gb': team['gamesBack']
-                    })
-                print(f"✅ MLB: {len(self.standings)} teams loaded")
-                return True
-        except Exception as e:
-            print(f"❌ MLB fetch error: {e}")
-            self.standings = None
-            return False
-            
-    def get_team_abbr(self, team_name):
-        abbrs = {
-            'Atlanta Braves': 'ATL',
-            'New York Mets': 'NYM',
-            'Philadelphia Phillies': 'PHI',
-            'Miami Marlins': 'MIA',
-            'Washington Nationals': 'WSH'
-        }
-        return abbrs.get(team_name, team_name[:3].upper())
-        
-    def render(self):
-        self.display.clear()
-        
-        if not self.standings:
-            self.display.draw_text('LOADING', 8, 12, 255, 255, 0)
-            self.display.show()
-            return
-            
-        # Row 0-4: Title
-        self.display.draw_text('NL EAST', 22, 0, 255, 100, 100)
-        
-        y_positions = [6, 12, 18, 24]
+def create_app():
+    """Import Flask and register the API
+    
+    Deferred until after the first frame is on the panel: Flask and
+    flask_cors take seconds to import on a Pi Zero.
+    """
+    from flask import Flask, Response, jsonify, request
+    from flask_cors import CORS
+    
+    app = Flask(__name__)
+    CORS(app)
+    
+    @app.route('/api/screen', methods=['GET'])
+    def get_screen():
+        return jsonify({
+            'current': current_screen,
+            'auto_rotate': auto_rotate,
+            'division': mlb_display.division if mlb_display else None
+        })
+
+    def wait_for(command):
+        """Block until the display thread has swapped the result; latency in ms or None"""
+        if command.applied.wait(COMMAND_TIMEOUT):
+            return round(command.latency * 1000, 1)
+        return None
+
+    def timed_out():
+        """Response for a command the display thread didn't show in time (stalled or dead)"""
+        return jsonify({
+            'success': False,
+            'error': f"Display did not apply the command within {COMMAND_TIMEOUT}s",
+            'display_alive': bool(display_thread and display_thread.is_alive())
+        }), 504
+
+    @app.route('/api/screen', methods=['POST'])
+    def set_screen():
+        data = request.json
         
-        for idx, team in enumerate(self.standings[:4]):
-            y = y_positions[idx]
+        args = {}
+        if data.get('screen') in ['weather', 'mlb', 'subway']:
+            args['screen'] = data['screen']
+        if 'auto_rotate' in data:
+            args['auto_rotate'] = bool(data['auto_rotate'])
+        if 'division' in data:
+            # Any division from the standings already fetched; switches to the MLB screen
+            try:
+                args['division'] = int(data['division'])
+            except (TypeError, ValueError):
+                args['division'] = None
+            if args['division'] not in DIVISIONS:
+                return jsonify({'success': False, 'error': f"Unknown division, use one of {sorted(DIVISIONS)}"}), 400
             
-            if idx == 0:
-                color = (100, 255, 100)
-            else:
-                color = (180, 180, 200)
-                
-            self.display.draw_text(team['name'], 1, y, *color)
-            self.display.draw_text(str(team['wins']), 18, y, 100, 200, 255)
-            self.display.draw_text(str(team['losses']), 32, y, 255, 150, 100)
-            
-            if idx > 0 and team['gb'] not in ['-', '0.0']:
-                gb = float(team['gb'])
-                if gb > 0:
-                    self.display.draw_text(str(team['gb']), 46, y, 200, 200, 100)
-                    
-        self.display.show()
+        latency = wait_for(commands.submit('screen', **args))
+        if latency is None:
+            return timed_out()
+        return jsonify({'success': True, 'current': current_screen, 'auto_rotate': auto_rotate, 'division': mlb_display.division, 'latency_ms': latency})
 
+    @app.route('/api/message', methods=['POST'])
+    def set_message():
+        data = request.json
+        
+        message = str(data.get('message', ''))
+        latency = wait_for(commands.submit('message', message=message))
+        if latency is None:
+            return timed_out()
+        return jsonify({'success': True, 'current': current_screen, 'message': message, 'latency_ms': latency})
 
-class SubwayDisplay:
-    def __init__(self, display):
-        self.display = display
-        self.trains = None
+    @app.route('/api/color', methods=['POST'])
+    def set_color():
+        """Change brightness, gamma or theme; applied at blit time with no re-render"""
+        data = request.json
         
-    def fetch_trains(self):
+        args = {key: data[key] for key in ('brightness', 'gamma', 'theme') if key in data}
+        if 'theme' in args and (not isinstance(args['theme'], str) or args['theme'] not in THEMES):
+            return jsonify({'success': False, 'error': f"Unknown theme, use one of {sorted(THEMES)}"}), 400
         try:
-            url = 'https://demo.transiter.dev/systems/us-ny-subway/stops/A38'
-            proxied_url = f'https://api.allorigins.win/get?url={requests.utils.quote(url)}'
-            
-            response = requests.get(proxied_url, timeout=10)
-            proxy_data = response.json()
-            data = json.loads(proxy_data['contents'])
+            for key in ('brightness', 'gamma'):
+                if key in args:
+                    args[key] = finite(args[key], key)
+            if args.get('gamma', 1) <= 0:
+                raise ValueError("gamma must be positive")
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
             
-            all_trains = []
-            
-            if 'stopTimes' in data:
-                for st in data['stopTimes']:
-                    route = st.get('trip', {}).get('route', {}).get('id')
-                    headsign = st.get('headsign', '')
+        latency = wait_for(commands.submit('color', **args))
+        if latency is None:
+            return timed_out()
+        return jsonify({'success': True, 'color': display.color.settings(), 'latency_ms': latency})
+
+    @app.route('/api/status', methods=['GET'])
+    def get_status():
+        return jsonify({
+            'screen': current_screen,
+            'auto_rotate': auto_rotate,
+            'available_screens': ['weather', 'mlb', 'subway'],
+            'frames': display.frame_stats() if display else None,
+            'refresh': scheduler.status() if scheduler else None,
+            'http': http_client.stats(),
+            'fps': frame_clock.stats() if frame_clock else None,
+            'startup': startup.phases if startup else None,
+            'stream': frame_stream.stats(),
+            'render_process': render_process.stats() if render_process else None,
+            'color': display.color.settings() if display else None
+        })
+
+    @app.route('/api/stream', methods=['GET'])
+    def stream_frames():
+        """Server-Sent Events: a keyframe, then base64 RGB565 deltas as the panel changes"""
+        def events():
+            yield 'retry: 2000\n\n'
+            for message in frame_stream.frames():
+                if message is None:
+                    yield ': keepalive\n\n'  # Keeps proxies from closing an idle stream
+                else:
+                    yield f"data: {base64.b64encode(message).decode()}\n\n"
                     
-                    if route == 'A' and 'Uptown' in headsign and 'departure' in st:
-                        departure_time = st['departure']['time']
-                        now = time.time()
-                        minutes_away = int((departure_time - now) / 60)
-                        
-                        if 0 <= minutes_away < 30:
-                            all_trains.append({
-                                'minutes': minutes_away,
-                                'destination': 'UPTOWN'
-                            })
-                            
-            self.trains = sorted(all_trains, key=lambda x: x['minutes'])[:4]
-            
-            if not self.trains:
-                self.trains = [{'minutes': None, 'destination': 'NO TRAINS'}]
-                
-            print(f"✅ Subway: {len([t for t in self.trains if t['minutes'] is not None])} trains")
-            return True
-        except Exception as e:
-            print(f"❌ Subway fetch error: {e}")
-            self.trains = [{'minutes': None, 'destination': 'ERROR'}]
-            return False
-            
-    def render(self):
-        self.display.clear()
-        
-        if not self.trains:
-            self.display.draw_text('LOADING', 8, 12, 255, 255, 0)
-            self.display.show()
-            return
-            
-        self.display.draw_text('A TRAIN', 1, 0, 0, 100, 255)
-        self.display.draw_text('FULTON', 34, 0, 200, 200, 220)
-        
-        y_positions = [6, 12, 18, 24]
+        return Response(events(), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+
+    @app.route('/api/metrics', methods=['GET'])
+    def get_metrics():
+        """Prometheus text exposition of frame timing, fetch latency and data freshness"""
+        now = time.time()
+        screens = {'weather': weather_display, 'mlb': mlb_display, 'subway': subway_display}
+        gauges = []
         
-        for idx, train in enumerate(self.trains[:4]):
-            y = y_positions[idx]
-            
-            if train['minutes'] is None:
-                self.display.draw_text('NO TRAINS', 8, y, 200, 200, 200)
-                continue
-                
-            if train['minutes'] <= 1:
-                color = (255, 50, 50)
-            elif train['minutes'] <= 5:
-                color = (255, 200, 0)
-            else:
-                color = (100, 255, 100)
-                
-            self.display.draw_text(str(idx + 1), 1, y, 150, 150, 200)
-            
-            min_str = 'NOW' if train['minutes'] == 0 else f"{train['minutes']}M"
-            self.display.draw_text(min_str, 8, y, *color)
+        if frame_clock:
+            stats = frame_clock.stats()
+            heartbeat = time.monotonic() - frame_clock.last_tick if frame_clock.last_tick else -1
+            late = [('loop="layout"', stats['late'])]
+            if render_process:
+                late.append(('loop="render"', render_process.ring.stats()['late']))
+            gauges += [
+                ('matrix_fps', 'gauge', 'Achieved frames per second', [('', stats['fps'])]),
+                ('matrix_target_fps', 'gauge', 'Configured frames per second', [('', stats['target_fps'])]),
+                ('matrix_frame_jitter_seconds', 'gauge', 'Std deviation of frame intervals', [('', stats['jitter_ms'] / 1000)]),
+                ('matrix_frames_dropped_total', 'counter', 'Frames skipped because the loop overran', [('', stats['dropped'])]),
+                ('matrix_frames_late_total', 'counter', 'Frames whose work ran past their deadline', late),
+                ('matrix_display_heartbeat_age_seconds', 'gauge', 'Seconds since the display loop last ticked', [('', round(heartbeat, 3))]),
+                ('matrix_wakeups_per_hour', 'gauge', 'Display loop wakeups over the last hour', [('', stats['wakeups_per_hour'])]),
+            ]
+        if display:
+            frames = display.frame_stats()
+            gauges.append(('matrix_frames_total', 'counter', 'Frames by whether they were swapped to the panel', [
+                ('result="pushed"', frames['pushed']),
+                ('result="skipped"', frames['skipped'])
+            ]))
             
-            self.display.draw_text('UPTOWN', 32, y, 180, 180, 200)
+        stream = frame_stream.stats()
+        gauges.append(('matrix_stream_viewers', 'gauge', 'Browsers connected to /api/stream', [('', stream['viewers'])]))
+        gauges.append(('matrix_stream_bytes_total', 'counter', 'Frame bytes sent to stream viewers', [('', stream['bytes_sent'])]))
             
-        self.display.show()
-
-
-# Global state
-current_screen = 'weather'
-auto_rotate = True
-matrix = None
-display = None
-weather_display = None
-mlb_display = None
-subway_display = None
-
-# Flask app
-app = Flask(__name__)
-CORS(app)
+        gauges.append(('matrix_data_age_seconds', 'gauge', 'Age of the data each screen is showing (-1 if none)', [
+            (f'screen="{name}"', round(now - screen.updated_at, 1) if screen and screen.updated_at else -1)
+            for name, screen in screens.items()
+        ]))
+        gauges.append(('matrix_data_stale', 'gauge', '1 if a screen is showing cached or failed-refresh data', [
+            (f'screen="{name}"', int(bool(screen and screen.stale)))
+            for name, screen in screens.items()
+        ]))
+        gauges.append(('matrix_thread_up', 'gauge', 'Live threads by role (display loop is 1 or 0, fetch is the pool size)', [
+            ('thread="display"', int(bool(display_thread and display_thread.is_alive()))),
+            ('thread="fetch"', sum(1 for t in threading.enumerate() if t.name.startswith('fetch')))
+        ]))
+        
+        return Response(metrics.prometheus_text(gauges), mimetype='text/plain; version=0.0.4')
 
-@app.route('/api/screen', methods=['GET'])
-def get_screen():
-    return jsonify({
-        'current': current_screen,
-        'auto_rotate': auto_rotate
-    })
+        
+    return app
 
-@app.route('/api/screen', methods=['POST'])
-def set_screen():
+def apply_command(command):
+    """Apply one API command on the display thread"""
     global current_screen, auto_rotate
     
-    data = request.json
-    
-    if 'screen' in data:
-        screen = data['screen']
-        if screen in ['weather', 'mlb', 'subway']:
-            current_screen = screen
+    if command.name == 'screen':
+        if 'screen' in command.args:
+            current_screen = command.args['screen']
             print(f"📺 Screen changed to: {current_screen}")
-            
-    if 'auto_rotate' in data:
-        auto_rotate = data['auto_rotate']
-        print(f"🔄 Auto-rotate: {auto_rotate}")
-        
-    return jsonify({'success': True, 'current': current_screen, 'auto_rotate': auto_rotate})
-
-@app.route('/api/status', methods=['GET'])
-def get_status():
-    return jsonify({
-        'screen': current_screen,
-        'auto_rotate': auto_rotate,
-        'available_screens': ['weather', 'mlb', 'subway']
-    })
+        if 'auto_rotate' in command.args:
+            auto_rotate = command.args['auto_rotate']
+            print(f"🔄 Auto-rotate: {auto_rotate}")
+        if 'division' in command.args:
+            mlb_display.show_division(command.args['division'])
+            if 'screen' not in command.args:
+                current_screen = 'mlb'
+            print(f"⚾ Division: {DIVISIONS[command.args['division']][0]}")
+    elif command.name == 'color':
+        try:
+            display.color.set(**command.args)
+            print(f"🎨 Color: {command.args}")
+        except (TypeError, ValueError) as e:
+            print(f"❌ Color change rejected: {e}")
+    elif command.name == 'message':
+        message_display.set_message(command.args['message'])
+        current_screen = 'message'
+        print(f"💬 Message: {command.args['message']}")
 
 
 def display_loop():
     """Background thread that updates the display"""
-    global current_screen, auto_rotate
+    global current_screen, auto_rotate, frame_clock
     
-    last_update = 0
-    last_rotation = time.time()
+    frame_clock = FrameClock(TARGET_FPS)
+    last_rotation = time.monotonic()
+    shown_screen = current_screen
+    transition = None
+    pending = []  # Applied commands whose result hasn't reached the panel yet
     
     screens = ['weather', 'mlb', 'subway']
+    renderers = {
+        'weather': weather_display,
+        'mlb': mlb_display,
+        'subway': subway_display,
+        'message': message_display
+    }
     
     while True:
-        now = time.time()
+        now = time.monotonic()
         
-        # Auto-rotate every 30 seconds
-        if auto_rotate and (now - last_rotation) >= 30:
-            current_idx = screens.index(current_screen)
-            current_screen = screens[(current_idx + 1) % len(screens)]
+        # API commands first; a manual switch restarts the rotation timer
+        for command in commands.drain():
+            apply_command(command)
+            pending.append(command)
+            last_rotation = now
+            
+        # Auto-rotate every ROTATION_INTERVAL seconds
+        if auto_rotate and (now - last_rotation) >= ROTATION_INTERVAL:
+            if current_screen in screens:
+                current_idx = screens.index(current_screen)
+                current_screen = screens[(current_idx + 1) % len(screens)]
+            else:
+                current_screen = screens[0]  # Back from a pushed message
             last_rotation = now
             print(f"📺 Auto-rotating to: {current_screen}")
         
-        # Refresh data every 60 seconds
-        if (now - last_update) >= 60:
-            print(f"🔄 Refreshing data...")
-            weather_display.fetch_weather()
-            mlb_display.fetch_standings()
-            subway_display.fetch_trains()
-            last_update = now
+        # Refresh whichever sources are due (runs on the fetch pool, never blocks rendering);
+        # while rotating, the next screen's data is refetched ahead of its slot if needed
+        if auto_rotate:
+            upcoming = screens[(screens.index(current_screen) + 1) % len(screens)] if current_screen in screens else screens[0]
+            scheduler.prefetch(upcoming, last_rotation + ROTATION_INTERVAL)
+        scheduler.poll(now)
         
+        # Animate into the new screen whether it came from rotation or the API
+        screen = current_screen
+        if screen != shown_screen:
+            # Begin one step in, so the very next swap already shows the change
+            transition = display.transition_to(renderers[screen].render, start=now - frame_clock.period)
+            shown_screen = screen
+            if screen in scheduler.screens:
+                scheduler.shown(screen)
+            
         # Render current screen
-        if current_screen == 'weather':
-            weather_display.render()
-        elif current_screen == 'mlb':
-            mlb_display.render()
-        elif current_screen == 'subway':
-            subway_display.render()
+        pushed = display.frames_pushed
+        if transition is not None and not transition.done(now):
+            display.show_frame(transition.frame(now))
+        else:
+            transition = None
+            renderers[screen].render()
             
-        time.sleep(1)
+        # Done once a frame reflecting them is swapped, or nothing needed to change
+        if pending and (display.frames_pushed > pushed or transition is None):
+            commands.complete(pending)
+            pending = []
+            
+        # Between animations, sleep until something visible is due to change;
+        # commands and finished fetches set commands.ready and cut the sleep short
+        until = None
+        if transition is None and not pending:
+            times = [display.next_change(now), scheduler.next_poll()]
+            if auto_rotate:
+                times.append(last_rotation + ROTATION_INTERVAL)
+            until = min((t for t in times if t is not None), default=now + IDLE_MAX)
+        frame_clock.tick(wake=commands.ready, until=until)
 
 
 def main():
-    global matrix, display, weather_display, mlb_display, subway_display
+    global app, matrix, display, weather_display, mlb_display, subway_display, message_display, fetcher, scheduler, display_thread, render_process, startup
     
+    startup = StartupTimer(STARTED_AT)
     print("🎨 Web-Controlled RGB LED Matrix Display Starting...")
     print("🌐 API will be available at http://192.168.1.123:5000")
     
-    # Initialize matrix
-    matrix = configure_matrix()
-    display = MatrixDisplay(matrix)
+    # Initialize matrix, either here or in a separate process fed through shared memory
+    if RENDER_PROCESS:
+        width, height = PANEL_COLS * PANEL_CHAIN, PANEL_ROWS * PANEL_PARALLEL
+        render_process = RenderProcess(configure_matrix, width, height, TARGET_FPS)
+        render_process.start()
+        matrix = VirtualMatrix(width, height, [render_process.ring])
+    else:
+        matrix = configure_matrix()
+    # This panel has green and blue swapped; the colour stage reorders them at blit time
+    display = MatrixDisplay(matrix, font=FONT_3X5, color=ColorPipeline(channel_order=RGB_SEQUENCE or 'RBG'))
+    display.stream = frame_stream
+    startup.mark('matrix')
     
     # Create displays
     weather_display = WeatherDisplay(display)
     mlb_display = MLBDisplay(display)
     subway_display = SubwayDisplay(display)
+    message_display = MessageDisplay(display)
+    screens = {
+        'weather': weather_display,
+        'mlb': mlb_display,
+        'subway': subway_display
+    }
+    
+    # Draw the last good data (or LOADING) straight away; the first poll revalidates it
+    store = SnapshotStore()
+    store.load()
+    store.restore(screens)
+    screens[current_screen].render()
+    startup.mark('first frame')
     
-    # Initial data fetch
-    weather_display.fetch_weather()
-    mlb_display.fetch_standings()
-    subway_display.fetch_trains()
+    # Fetch in parallel off the render thread
+    fetcher = DataFetcher({
+        'weather': weather_display.fetch_weather,
+        'mlb': mlb_display.fetch_standings,
+        'subway': subway_display.fetch_trains
+    })
+    scheduler = RefreshScheduler(fetcher, screens, store, wake=commands.ready)
     
     # Start display loop in background thread
     display_thread = threading.Thread(target=display_loop, daemon=True)
     display_thread.start()
+    startup.mark('display loop')
     
-    # Run Flask app
-    app.run(host='0.0.0.0', port=5000, debug=False)
-
+    # Heavy imports, now that the panel is already showing something
+    http_client.connect()
+    startup.mark('requests')
+    app = create_app()
+    startup.mark('flask')
+    startup.report()
+    
+    # Run Flask app (threaded: each /api/stream viewer holds a connection open)
+    app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
 
 if __name__ == '__main__':
     main()
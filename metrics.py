@@ -0,0 +1,93 @@
+"""
+Lightweight metrics for the matrix display, exported in Prometheus text format
+
+Frame metrics are only ever written by the render thread, so recording is
+a bisect and a few integer adds with no locking. Fetch metrics come from
+the fetch pool and take a lock, but fetches happen seconds apart.
+"""
+
+import threading
+from bisect import bisect_left
+
+FRAME_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1)
+FETCH_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COMMAND_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels=''):
+        sep = ',' if labels else ''
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}'
+        suffix = f'{{{labels}}}' if labels else ''
+        yield f'{name}_sum{suffix} {self.sum}'
+        yield f'{name}_count{suffix} {self.count}'
+
+
+frame_render = Histogram(FRAME_BUCKETS)  # Composing a frame (everything but the sleep)
+frame_swap = Histogram(FRAME_BUCKETS)  # SetImage + SwapOnVSync for frames actually pushed
+command_latency = Histogram(COMMAND_BUCKETS)  # API command submitted -> result swapped to the panel
+
+fetch_latency = {}  # source -> Histogram
+fetch_results = {}  # (source, 'success' | 'failure') -> count
+fetch_lock = threading.Lock()
+
+
+def observe_fetch(source, seconds, ok):
+    with fetch_lock:
+        histogram = fetch_latency.get(source)
+        if histogram is None:
+            histogram = fetch_latency[source] = Histogram(FETCH_BUCKETS)
+        histogram.observe(seconds)
+        key = (source, 'success' if ok else 'failure')
+        fetch_results[key] = fetch_results.get(key, 0) + 1
+
+
+def prometheus_text(gauges=()):
+    """Render all recorded metrics plus extra gauges
+
+    gauges: iterable of (name, type, help, [(labels, value), ...])
+    """
+    lines = [
+        '# HELP matrix_frame_render_seconds Time spent composing each frame',
+        '# TYPE matrix_frame_render_seconds histogram',
+        *frame_render.lines('matrix_frame_render_seconds'),
+        '# HELP matrix_frame_swap_seconds Time spent blitting and swapping changed frames',
+        '# TYPE matrix_frame_swap_seconds histogram',
+        *frame_swap.lines('matrix_frame_swap_seconds'),
+        '# HELP matrix_command_latency_seconds Time from an API command to the panel showing it',
+        '# TYPE matrix_command_latency_seconds histogram',
+        *command_latency.lines('matrix_command_latency_seconds'),
+    ]
+
+    with fetch_lock:
+        lines.append('# HELP matrix_fetch_seconds Upstream fetch latency per source')
+        lines.append('# TYPE matrix_fetch_seconds histogram')
+        for source, histogram in sorted(fetch_latency.items()):
+            lines.extend(histogram.lines('matrix_fetch_seconds', f'source="{source}"'))
+        lines.append('# HELP matrix_fetch_total Fetches per source by result')
+        lines.append('# TYPE matrix_fetch_total counter')
+        for (source, result), count in sorted(fetch_results.items()):
+            lines.append(f'matrix_fetch_total{{source="{source}",result="{result}"}} {count}')
+
+    for name, kind, help_text, samples in gauges:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in samples:
+            suffix = f'{{{labels}}}' if labels else ''
+            lines.append(f'{name}{suffix} {value}')
+
+    return '\n'.join(lines) + '\n'
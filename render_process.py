@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Dedicated render process that owns the panel
+
+The web app normally drives the RGBMatrix from a thread, so GC pauses,
+JSON parsing and Flask requests in the same interpreter can delay a
+swap. With MATRIX_RENDER_PROCESS=1 the panel is handed to a separate
+process that does nothing but copy the newest frame out of a shared-memory
+ring and swap it on vsync. Layout, fetching and the API keep running in
+the web process and write frames into the ring through a VirtualMatrix.
+
+    MATRIX_RENDER_PROCESS=1 MATRIX_RENDER_CPUS=3 sudo python3 matrix_display_web.py
+
+MATRIX_RENDER_CPUS pins the render process to those cores (e.g. '3' or
+'2,3') and keeps the web process off them.
+"""
+
+import gc
+import os
+import atexit
+import struct
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+from PIL import Image
+
+RENDER_PROCESS = os.environ.get('MATRIX_RENDER_PROCESS', '') not in ('', '0')
+RENDER_CPUS = {int(cpu) for cpu in os.environ.get('MATRIX_RENDER_CPUS', '').split(',') if cpu.strip()}
+
+# Frames the writer can get ahead before the reader sees a torn slot
+RING_SLOTS = 4
+
+
+class FrameRing:
+    """Single-writer, single-reader ring of RGB frames in shared memory
+
+    Layout: u64 latest sequence, render stats (u64 shown, dropped, late,
+    torn, f64 heartbeat), then RING_SLOTS slots of u64 sequence + pixels.
+    Each slot is a seqlock: the writer clears the slot's stamp to 0
+    (never a valid sequence), fills the pixels, stamps the new sequence,
+    then publishes it in the header; no locks are taken. The reader
+    checks the stamp before and after copying and keeps the frame only if
+    both match the sequence it wanted, so a slot the writer laps mid-copy
+    is detected and skipped instead of shown torn.
+    """
+
+    LATEST = struct.Struct('<Q')
+    STATS = struct.Struct('<QQQQd')
+    SLOT = struct.Struct('<Q')
+
+    def __init__(self, width, height, name=None, slots=RING_SLOTS):
+        self.width = width
+        self.height = height
+        self.slots = slots
+        self.frame_size = width * height * 3
+        self.slot_size = self.SLOT.size + self.frame_size
+        self.base = self.LATEST.size + self.STATS.size
+        size = self.base + slots * self.slot_size
+
+        if name is None:
+            self.segment = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.segment = attach(name)
+            self.owner = False
+        self.name = self.segment.name
+        self.sequence = 0
+        self.seen = 0
+
+    def write(self, image, index):
+        """VirtualMatrix sink: publish a swapped frame"""
+        self.sequence += 1
+        start = self.base + (self.sequence % self.slots) * self.slot_size
+        buf = self.segment.buf
+        self.SLOT.pack_into(buf, start, 0)  # Mark the slot as being written
+        buf[start + self.SLOT.size:start + self.slot_size] = image.tobytes()
+        self.SLOT.pack_into(buf, start, self.sequence)
+        self.LATEST.pack_into(buf, 0, self.sequence)
+
+    def read(self):
+        """Newest unseen frame as an Image, or None"""
+        buf = self.segment.buf
+        sequence = self.LATEST.unpack_from(buf, 0)[0]
+        if sequence == self.seen:
+            return None
+
+        start = self.base + (sequence % self.slots) * self.slot_size
+        if self.SLOT.unpack_from(buf, start)[0] != sequence:
+            return self.torn()
+        pixels = bytes(buf[start + self.SLOT.size:start + self.slot_size])
+        if self.SLOT.unpack_from(buf, start)[0] != sequence:
+            return self.torn()  # Writer lapped the ring while we copied
+
+        self.seen = sequence
+        return Image.frombytes('RGB', (self.width, self.height), pixels)
+
+    def torn(self):
+        shown, dropped, late, torn, heartbeat = self.STATS.unpack_from(self.segment.buf, self.LATEST.size)
+        self.STATS.pack_into(self.segment.buf, self.LATEST.size, shown, dropped, late, torn + 1, heartbeat)
+        return None
+
+    def publish_stats(self, shown, dropped, late, heartbeat):
+        torn = self.STATS.unpack_from(self.segment.buf, self.LATEST.size)[3]
+        self.STATS.pack_into(self.segment.buf, self.LATEST.size, shown, dropped, late, torn, heartbeat)
+
+    def stats(self):
+        shown, dropped, late, torn, heartbeat = self.STATS.unpack_from(self.segment.buf, self.LATEST.size)
+        return {
+            'written': self.sequence,
+            'shown': shown,
+            'dropped': dropped,
+            'late': late,
+            'torn': torn,
+            'heartbeat_age': round(time.monotonic() - heartbeat, 3) if heartbeat else None
+        }
+
+    def close(self):
+        self.segment.close()
+        if self.owner:
+            self.segment.unlink()
+
+
+def attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def pin(cpus):
+    """Restrict this process to cpus; ignored where affinity isn't supported"""
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+        return True
+    return False
+
+
+def render_loop(configure, name, width, height, fps, cpus):
+    """Body of the render process: blit the newest ring frame every vsync"""
+    from matrix_display import FrameClock
+
+    parent = os.getppid()
+    if pin(cpus):
+        print(f"📌 Render process pinned to CPU {','.join(map(str, sorted(cpus)))}")
+
+    ring = FrameRing(width, height, name)
+    matrix = configure()
+    canvas = matrix.CreateFrameCanvas()
+    clock = FrameClock(fps)
+    shown = 0
+
+    # Nothing below allocates much; keep the collector from pausing a frame
+    gc.collect()
+    gc.freeze()
+
+    while os.getppid() == parent:  # Exit with the web process
+        frame = ring.read()
+        if frame is not None:
+            canvas.SetImage(frame)
+            canvas = matrix.SwapOnVSync(canvas)
+            shown += 1
+        now = clock.tick()
+        ring.publish_stats(shown, clock.dropped, clock.late, now)
+
+    matrix.Clear()
+    ring.close()
+
+
+class RenderProcess:
+    """Starts render_loop in its own process and hands back the ring to draw into"""
+
+    def __init__(self, configure, width, height, fps, cpus=RENDER_CPUS):
+        self.ring = FrameRing(width, height)
+        self.cpus = set(cpus)
+        self.process = multiprocessing.Process(
+            target=render_loop,
+            args=(configure, self.ring.name, width, height, fps, self.cpus),
+            name='render',
+            daemon=True
+        )
+
+    def start(self):
+        self.process.start()
+        if self.cpus and hasattr(os, 'sched_setaffinity'):
+            others = set(os.sched_getaffinity(0)) - self.cpus
+            if others:
+                pin(others)  # Leave the render cores to the render process
+        print(f"🖼️ Render process started (pid {self.process.pid})")
+        atexit.register(self.stop)
+
+    def stats(self):
+        return dict(self.ring.stats(), pid=self.process.pid, alive=self.process.is_alive(), cpus=sorted(self.cpus))
+
+    def stop(self):
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=2)
+        if self.ring.segment.buf is not None:
+            self.ring.close()
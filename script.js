@@ -979,9 +979,66 @@ class SubwayDisplay {
     }
 }
 
+// Live mirror of the physical panel
+// The Pi streams every frame it swaps to the LEDs over Server-Sent Events,
+// so while connected the browser fetches nothing itself and just paints pixels.
+// Message layout (big-endian): u8 kind (0 key, 1 delta), u32 sequence,
+// u16 x, u16 y, u16 w, u16 h, then w*h RGB565 pixels row by row
+class PanelStream {
+    constructor(matrix) {
+        this.matrix = matrix;
+        this.source = null;
+    }
+
+    connect(url) {
+        this.disconnect();
+        this.source = new EventSource(url);
+        this.source.onopen = () => console.log('📡 Mirroring physical display');
+        this.source.onmessage = (event) => this.apply(event.data);
+        this.source.onerror = () => console.log('⚠️ Panel stream interrupted, retrying...');
+    }
+
+    disconnect() {
+        if (this.source) {
+            this.source.close();
+            this.source = null;
+        }
+    }
+
+    apply(data) {
+        const bytes = Uint8Array.from(atob(data), c => c.charCodeAt(0));
+        const view = new DataView(bytes.buffer);
+        const kind = view.getUint8(0);
+        const x0 = view.getUint16(5);
+        const y0 = view.getUint16(7);
+        const w = view.getUint16(9);
+        const h = view.getUint16(11);
+
+        if (kind === 0) {
+            this.matrix.clear();
+        }
+
+        let offset = 13;
+        for (let y = y0; y < y0 + h; y++) {
+            for (let x = x0; x < x0 + w; x++) {
+                const pixel = view.getUint16(offset);
+                offset += 2;
+                const r = (pixel >> 11) & 0x1f;
+                const g = (pixel >> 5) & 0x3f;
+                const b = pixel & 0x1f;
+                this.matrix.setPixel(x, y, (r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2));
+            }
+        }
+        this.matrix.render();
+        document.getElementById('lastUpdate').textContent =
+            `Live from Pi: ${new Date().toLocaleTimeString()}`;
+    }
+}
+
 // Initialize
 const matrix = new LEDMatrix('ledMatrix');
 const screenManager = new ScreenManager(matrix);
+const panelStream = new PanelStream(matrix);
 
 // Pi Control Settings
 const PI_IP = '192.168.1.123';
@@ -1005,6 +1062,9 @@ async function sendToPi(screen) {
         
         if (response.ok) {
             console.log(`✅ Pi screen changed to: ${screen}`);
+        } else {
+            const data = await response.json().catch(() => ({}));
+            console.log(`⚠️ Pi did not change screen: ${data.error || response.status}`);
         }
     } catch (error) {
         console.log('⚠️ Could not connect to Pi:', error.message);
@@ -1012,6 +1072,7 @@ async function sendToPi(screen) {
 }
 
 async function updateDisplay() {
+    if (piControlEnabled) return; // The Pi's stream is drawing the matrix
     await screenManager.update();
 }
 
@@ -1020,36 +1081,40 @@ document.getElementById('refreshBtn').addEventListener('click', updateDisplay);
 
 // Screen switching buttons
 document.getElementById('weatherBtn').addEventListener('click', async () => {
-    await screenManager.switchScreen('weather');
+    if (!piControlEnabled) await screenManager.switchScreen('weather');
     setActiveButton('weatherBtn');
     sendToPi('weather');
 });
 
 document.getElementById('mlbBtn').addEventListener('click', async () => {
-    await screenManager.switchScreen('mlb');
+    if (!piControlEnabled) await screenManager.switchScreen('mlb');
     setActiveButton('mlbBtn');
     sendToPi('mlb');
 });
 
 document.getElementById('subwayBtn').addEventListener('click', async () => {
-    await screenManager.switchScreen('subway');
+    if (!piControlEnabled) await screenManager.switchScreen('subway');
     setActiveButton('subwayBtn');
     sendToPi('subway');
 });
 
 document.getElementById('busBtn').addEventListener('click', async () => {
     // For now, just clear and show message
-    matrix.clear();
-    matrix.drawText('M15 BUS', 8, 8, 255, 150, 0);
-    matrix.drawText('WALL ST', 8, 16, 200, 200, 200);
-    matrix.render();
+    if (!piControlEnabled) {
+        matrix.clear();
+        matrix.drawText('M15 BUS', 8, 8, 255, 150, 0);
+        matrix.drawText('WALL ST', 8, 16, 200, 200, 200);
+        matrix.render();
+    }
     setActiveButton('busBtn');
     sendToPi('bus');
 });
 
 document.getElementById('offBtn').addEventListener('click', async () => {
-    matrix.clear();
-    matrix.render();
+    if (!piControlEnabled) {
+        matrix.clear();
+        matrix.render();
+    }
     setActiveButton('offBtn');
     sendToPi('off');
 });
@@ -1066,6 +1131,14 @@ function togglePiControl() {
     if (checkbox) {
         piControlEnabled = checkbox.checked;
         console.log(`🖥️ Pi Control: ${piControlEnabled ? 'Enabled' : 'Disabled'}`);
+        
+        // Mirror the real panel while controlling it; otherwise simulate locally
+        if (piControlEnabled) {
+            panelStream.connect(`http://${PI_IP}:${PI_PORT}/api/stream`);
+        } else {
+            panelStream.disconnect();
+            updateDisplay();
+        }
     }
 }
 
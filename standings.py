@@ -0,0 +1,98 @@
+"""
+Streaming parse of MLB Stats API standings
+
+The standings document carries ~30 fields per team plus nested split
+records, but the display only needs a name, wins, losses and games back.
+The request asks the API for just those fields (`fields=`), which cuts
+the payload about twentyfold. parse_standings() also projects as it
+parses: each JSON object is trimmed to the wanted keys the moment it
+closes, so unwanted subtrees are dropped mid-parse and the full document
+tree is never built, even if a server ignores the field list.
+
+Result: {division id: ({'name', 'wins', 'losses', 'gb'}, ...)} for every
+division in the payload, in standings order.
+
+    MLB_DIVISION=201     division shown (see DIVISIONS), default NL East
+    MLB_SEASON=2024      pin a season instead of following the calendar
+"""
+
+import os
+import time
+import json
+
+# Division id -> (title, league id); every title is 7 characters so the header never moves
+DIVISIONS = {
+    200: ('AL WEST', 103),
+    201: ('AL EAST', 103),
+    202: ('AL CENT', 103),
+    203: ('NL WEST', 104),
+    204: ('NL EAST', 104),
+    205: ('NL CENT', 104),
+}
+
+TEAM_ABBRS = {
+    'Arizona Diamondbacks': 'ARI', 'Athletics': 'ATH', 'Atlanta Braves': 'ATL',
+    'Baltimore Orioles': 'BAL', 'Boston Red Sox': 'BOS', 'Chicago Cubs': 'CHC',
+    'Chicago White Sox': 'CWS', 'Cincinnati Reds': 'CIN', 'Cleveland Guardians': 'CLE',
+    'Colorado Rockies': 'COL', 'Detroit Tigers': 'DET', 'Houston Astros': 'HOU',
+    'Kansas City Royals': 'KC', 'Los Angeles Angels': 'LAA', 'Los Angeles Dodgers': 'LAD',
+    'Miami Marlins': 'MIA', 'Milwaukee Brewers': 'MIL', 'Minnesota Twins': 'MIN',
+    'New York Mets': 'NYM', 'New York Yankees': 'NYY', 'Oakland Athletics': 'OAK',
+    'Philadelphia Phillies': 'PHI', 'Pittsburgh Pirates': 'PIT', 'San Diego Padres': 'SD',
+    'San Francisco Giants': 'SF', 'Seattle Mariners': 'SEA', 'St. Louis Cardinals': 'STL',
+    'Tampa Bay Rays': 'TB', 'Texas Rangers': 'TEX', 'Toronto Blue Jays': 'TOR',
+    'Washington Nationals': 'WSH'
+}
+
+# Fields the API is asked to return; the parser reads only these anyway
+STANDINGS_FIELDS = 'records,division,id,teamRecords,team,name,wins,losses,gamesBack'
+STANDINGS_URL = ('https://statsapi.mlb.com/api/v1/standings?leagueId=103,104&season={season}'
+                 '&standingsTypes=regularSeason&fields=' + STANDINGS_FIELDS)
+
+# Before this month the previous season's final standings are shown
+SEASON_START_MONTH = 3
+
+DIVISION = int(os.environ.get('MLB_DIVISION', 204))
+SEASON = os.environ.get('MLB_SEASON')
+
+KEEP = frozenset(STANDINGS_FIELDS.split(','))
+
+
+def current_season(now=None):
+    """Season to show: MLB_SEASON if set, else this year once spring starts"""
+    if SEASON:
+        return int(SEASON)
+    today = time.localtime(now)
+    return today.tm_year if today.tm_mon >= SEASON_START_MONTH else today.tm_year - 1
+
+
+def team_abbr(team_name):
+    return TEAM_ABBRS.get(team_name, team_name[:3].upper())
+
+
+def project(pairs):
+    """object_pairs_hook: keep only the fields the display reads"""
+    return {key: value for key, value in pairs if key in KEEP}
+
+
+PROJECTING_DECODER = json.JSONDecoder(object_pairs_hook=project)
+
+
+def parse_standings(text):
+    """Standings JSON text -> {division id: teams}, building only the rendered fields"""
+    data = PROJECTING_DECODER.decode(text)
+    divisions = {}
+    for record in data.get('records', ()):
+        division = record.get('division', {}).get('id')
+        if division is None:
+            continue
+        divisions[division] = tuple(
+            {
+                'name': team_abbr(team['team']['name']),
+                'wins': team['wins'],
+                'losses': team['losses'],
+                'gb': team['gamesBack']
+            }
+            for team in record.get('teamRecords', ())
+        )
+    return divisions
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Headless stand-in for the rgbmatrix library
+Runs the full render pipeline without a panel (development, CI, profiling)
+
+Select it with environment variables:
+    MATRIX_BACKEND=virtual                  keep frames in memory only
+    MATRIX_BACKEND=png  MATRIX_OUTPUT=dir   write every swapped frame as a PNG
+    MATRIX_BACKEND=shm  MATRIX_OUTPUT=name  publish frames to shared memory
+"""
+
+import os
+import atexit
+import struct
+from multiprocessing import shared_memory
+from PIL import Image
+
+
+class VirtualCanvas:
+    """Mimics rgbmatrix's FrameCanvas, backed by a PIL image"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.image = Image.new('RGB', (width, height))
+
+    def SetPixel(self, x, y, r, g, b):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.image.putpixel((x, y), (r, g, b))
+
+    def Clear(self):
+        self.Fill(0, 0, 0)
+
+    def Fill(self, r, g, b):
+        self.image.paste((r, g, b), (0, 0, self.width, self.height))
+
+    def SetImage(self, image, offset_x=0, offset_y=0, unsafe=True):
+        self.image.paste(image.convert('RGB'), (offset_x, offset_y))
+
+
+class VirtualMatrix:
+    """Mimics rgbmatrix's RGBMatrix: double-buffered canvases and SwapOnVSync
+
+    Every swap hands the new front frame to each sink, then returns the
+    previous front canvas for reuse, just like the real library.
+    """
+
+    def __init__(self, width=64, height=32, sinks=()):
+        self.width = width
+        self.height = height
+        self.brightness = 100
+        self.sinks = list(sinks)
+        self.front = VirtualCanvas(width, height)
+        self.frames = 0
+
+    def CreateFrameCanvas(self):
+        return VirtualCanvas(self.width, self.height)
+
+    def SwapOnVSync(self, canvas, framerate_fraction=1):
+        previous, self.front = self.front, canvas
+        for sink in self.sinks:
+            sink.write(canvas.image, self.frames)
+        self.frames += 1
+        return previous
+
+    def Clear(self):
+        self.front.Clear()
+
+    def Fill(self, r, g, b):
+        self.front.Fill(r, g, b)
+
+    @property
+    def image(self):
+        """The frame currently 'on the panel'"""
+        return self.front.image
+
+
+class NumpySink:
+    """Keeps the latest frame (and optionally a short history) as NumPy arrays"""
+
+    def __init__(self, history=0):
+        import numpy  # Only needed for this sink
+
+        self.numpy = numpy
+        self.history = history
+        self.frames = []
+        self.latest = None
+
+    def write(self, image, index):
+        self.latest = self.numpy.asarray(image).copy()  # (height, width, 3) uint8
+        if self.history:
+            self.frames.append(self.latest)
+            del self.frames[:-self.history]
+
+
+class PngSink:
+    """Writes every swapped frame to directory/frame_000000.png"""
+
+    def __init__(self, directory, scale=1):
+        self.directory = directory
+        self.scale = scale
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, image, index):
+        if self.scale != 1:
+            image = image.resize((image.width * self.scale, image.height * self.scale), Image.NEAREST)
+        image.save(os.path.join(self.directory, f"frame_{index:06d}.png"))
+
+
+class SharedMemorySink:
+    """Publishes frames to a named shared-memory segment
+
+    Layout: 8-byte little-endian frame counter, then width * height * 3
+    bytes of RGB. The counter works as a seqlock: it is 0 while the pixels
+    are being written and the new frame number once they are done. A
+    reader copies the pixels between two reads of the counter and keeps
+    the copy only if both reads match and are non-zero; otherwise a write
+    overlapped it and it should try again. A segment this process created
+    is unlinked at exit; one it attached to (e.g. left by an earlier run)
+    is only closed.
+    """
+
+    HEADER = struct.Struct('<Q')
+
+    def __init__(self, name, width=64, height=32):
+        size = self.HEADER.size + width * height * 3
+        try:
+            self.segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self.owner = True
+        except FileExistsError:
+            self.segment = shared_memory.SharedMemory(name=name)
+            self.owner = False
+            if self.segment.size < size:
+                self.segment.close()
+                raise ValueError(f"Shared memory '{name}' holds {self.segment.size} bytes, "
+                                 f"need {size} for {width}x{height}; remove /dev/shm/{name} or pick another MATRIX_OUTPUT")
+        atexit.register(self.close)
+
+    def write(self, image, index):
+        pixels = image.tobytes()
+        start = self.HEADER.size
+        self.HEADER.pack_into(self.segment.buf, 0, 0)  # Readers retry while this is 0
+        self.segment.buf[start:start + len(pixels)] = pixels
+        self.HEADER.pack_into(self.segment.buf, 0, index + 1)
+
+    def close(self):
+        if self.segment.buf is None:
+            return  # Already closed
+        self.segment.close()
+        if self.owner:
+            self.segment.unlink()
+
+
+def virtual_matrix_from_env(width=64, height=32):
+    """Build a VirtualMatrix if MATRIX_BACKEND asks for one, else return None"""
+    backend = os.environ.get('MATRIX_BACKEND', 'hardware')
+    output = os.environ.get('MATRIX_OUTPUT')
+
+    if backend == 'hardware':
+        return None
+    if backend == 'virtual':
+        sinks = []
+    elif backend == 'numpy':
+        sinks = [NumpySink()]
+    elif backend == 'png':
+        sinks = [PngSink(output or 'frames')]
+    elif backend == 'shm':
+        sinks = [SharedMemorySink(output or 'matrix_display', width, height)]
+    else:
+        raise ValueError(f"Unknown MATRIX_BACKEND: {backend}")
+
+    print(f"🖥️ Using virtual {width}x{height} matrix ({backend})")
+    return VirtualMatrix(width, height, sinks)